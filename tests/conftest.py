@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,17 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def clear_cache():
+    from core.test_runner import isolated_caches
+    with isolated_caches():
+        yield
+
+
+@pytest.fixture(autouse=True)
+def sync_thumbnails(settings):
+    # Миниатюры создаются в том же потоке, чтобы не писать во временную
+    # MEDIA_ROOT после завершения теста
+    settings.THUMBNAIL_WORKERS = 0
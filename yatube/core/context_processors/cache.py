@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Срок фрагментов {% cache %} для шаблонов."""
+    return {'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT}
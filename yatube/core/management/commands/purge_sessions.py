@@ -0,0 +1,31 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет просроченные сессии из базы пачками, не блокируя '
+            'таблицу одним большим DELETE')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько сессий удалять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = Session.objects.filter(
+            expire_date__lt=timezone.now()).order_by('expire_date')
+        total = 0
+        while True:
+            keys = list(expired.values_list(
+                'session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            Session.objects.filter(session_key__in=keys).delete()
+            total += len(keys)
+            self.stdout.write(f'Удалено {total}')
+        # Записи кэша истекают вместе с сессиями сами
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено просроченных сессий: {total}'))
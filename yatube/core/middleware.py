@@ -0,0 +1,37 @@
+from django.conf import settings
+
+from . import performance
+
+
+class PerformanceMiddleware:
+    """Замеряет время запроса, SQL, шаблонов и обращения к кэшу.
+
+    Итоги копятся в гистограммах по имени URL (posts:index,
+    posts:profile, ...), которые показывает core.views.performance_stats.
+    Заголовок Server-Timing получает персонал, а с SERVER_TIMING — все.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        performance.install()
+
+    def __call__(self, request):
+        with performance.collect() as stats:
+            response = self.get_response(request)
+        match = request.resolver_match
+        performance.record(
+            match.view_name if match else 'unresolved', stats)
+        if show_server_timing(request):
+            response['Server-Timing'] = stats.server_timing()
+        return response
+
+
+def show_server_timing(request):
+    if settings.SERVER_TIMING:
+        return True
+    # Без cookie сессии пользователь не загружается, чтобы анонимные
+    # запросы не читали сессию
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
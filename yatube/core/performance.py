@@ -0,0 +1,180 @@
+import bisect
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections
+from django.template.backends.django import Template
+
+# Границы корзин гистограммы времени ответа, мс
+BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_local = threading.local()
+_lock = threading.Lock()
+_histogram = {}
+
+
+class RequestStats:
+    """Счетчики одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total_ms = 0
+        self.db_ms = 0
+        self.queries = 0
+        self.template_ms = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._template_depth = 0
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        return ', '.join((
+            f'total;dur={self.total_ms:.1f}',
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'cache;desc="hits={self.cache_hits} '
+            f'misses={self.cache_misses}"',
+        ))
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = current_stats()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_ms += (time.perf_counter() - started) * 1000
+        stats.queries += 1
+
+
+def _count_cache(backend):
+    """Оборачивает get и get_many экземпляра кэша счетчиками попаданий.
+
+    Экземпляры кэшей у каждого потока свои, поэтому обертка ставится на
+    экземпляр один раз и не мешает другим потокам. get_many из BaseCache
+    сам вызывает get, поэтому оборачивается только собственный get_many
+    бэкенда, иначе ключи считались бы дважды.
+    """
+    if getattr(backend, '_performance_counted', False):
+        return
+    get, get_many = backend.get, backend.get_many
+    missing = object()
+
+    def counted_get(key, default=None, version=None):
+        value = get(key, missing, version=version)
+        stats = current_stats()
+        if stats is not None:
+            if value is missing:
+                stats.cache_misses += 1
+            else:
+                stats.cache_hits += 1
+        return default if value is missing else value
+
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        values = get_many(keys, version=version)
+        stats = current_stats()
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
+
+    backend.get = counted_get
+    if type(backend).get_many is not BaseCache.get_many:
+        backend.get_many = counted_get_many
+    backend._performance_counted = True
+
+
+_render = Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    stats = current_stats()
+    if stats is None:
+        return _render(self, context, request)
+    # Вложенные render_to_string уже входят во время внешнего шаблона
+    stats._template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _render(self, context, request)
+    finally:
+        stats._template_depth -= 1
+        if not stats._template_depth:
+            stats.template_ms += (time.perf_counter() - started) * 1000
+
+
+def install():
+    """Подменяет Template.render замером; вызывает PerformanceMiddleware."""
+    Template.render = _timed_render
+
+
+@contextmanager
+def collect():
+    """Собирает RequestStats для кода внутри блока."""
+    stats = RequestStats()
+    _local.stats = stats
+    # caches.all() возвращает только уже созданные в потоке кэши
+    for alias in settings.CACHES:
+        _count_cache(caches[alias])
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_query))
+            yield stats
+    finally:
+        stats.finish()
+        _local.stats = None
+
+
+def record(name, stats):
+    """Добавляет запрос в гистограмму представления name."""
+    with _lock:
+        entry = _histogram.setdefault(name, {
+            'requests': 0,
+            'buckets': [0] * (len(BUCKETS) + 1),
+            'total_ms': 0,
+            'db_ms': 0,
+            'queries': 0,
+            'template_ms': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
+        })
+        entry['requests'] += 1
+        entry['buckets'][bisect.bisect_left(BUCKETS, stats.total_ms)] += 1
+        for field in ('total_ms', 'db_ms', 'queries', 'template_ms',
+                      'cache_hits', 'cache_misses'):
+            entry[field] += getattr(stats, field)
+
+
+def snapshot():
+    """Копия гистограмм процесса со средними значениями."""
+    with _lock:
+        histogram = {
+            name: dict(entry, buckets=list(entry['buckets']))
+            for name, entry in _histogram.items()
+        }
+    for entry in histogram.values():
+        requests = entry['requests']
+        for field in ('total_ms', 'db_ms', 'queries', 'template_ms'):
+            entry[f'avg_{field}'] = round(entry[field] / requests, 2)
+        entry['buckets'] = dict(zip(
+            [f'<={bound}ms' for bound in BUCKETS] + [f'>{BUCKETS[-1]}ms'],
+            entry['buckets']))
+    return histogram
+
+
+def reset():
+    with _lock:
+        _histogram.clear()
@@ -0,0 +1,41 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'\bIN \((?:\?, )*\?\)')
+
+
+def normalize_sql(sql):
+    """SQL без литералов: одинаковые запросы с разными id совпадают."""
+    return IN_LISTS.sub('IN (...)', LITERALS.sub('?', sql))
+
+
+def format_queries(queries, budget):
+    """Пронумерованный список запросов; повторяющиеся по форме запросы
+    (признак N+1) помечены числом повторов.
+    """
+    repeats = Counter(normalize_sql(query['sql']) for query in queries)
+    lines = [f'Выполнено {len(queries)} SQL запросов, бюджет {budget}:']
+    for number, query in enumerate(queries, 1):
+        repeat = repeats[normalize_sql(query['sql'])]
+        mark = f'  [повторяется {repeat} раз]' if repeat > 1 else ''
+        lines.append(f'{number}. {query["sql"]}{mark}')
+    return '\n'.join(lines)
+
+
+@contextmanager
+def query_budget(budget, using=DEFAULT_DB_ALIAS):
+    """Проверяет, что в блоке выполнено не больше budget SQL запросов
+    к базе using.
+
+    При превышении AssertionError перечисляет все запросы блока.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    queries = context.captured_queries
+    if len(queries) > budget:
+        raise AssertionError(format_queries(queries, budget))
@@ -0,0 +1,56 @@
+"""Сессии в общем кэше с базой как постоянным хранилищем.
+
+Как cached_db, но сохранение, которое только продлевает срок сессии,
+пишется в кэш и базу не чаще раза в SESSION_WRITE_INTERVAL секунд.
+Поэтому скользящий срок (SESSION_SAVE_EVERY_REQUEST) не стоит записи на
+каждый запрос.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+
+KEY_PREFIX = 'core.sessions'
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        # Срок сессии, записанный в базу при последнем сохранении
+        self._stored_expiry = None
+
+    def load(self):
+        try:
+            stored = self._cache.get(self.cache_key)
+        except Exception:
+            # Memcached отвергает некорректные ключи, как в cached_db
+            stored = None
+        if stored is None:
+            session = self._get_session_from_db()
+            if session is None:
+                return {}
+            stored = (self.decode(session.session_data), session.expire_date)
+            self._cache.set(self.cache_key, stored, self.get_expiry_age(
+                expiry=session.expire_date))
+        data, self._stored_expiry = stored
+        return data
+
+    def refresh_due(self):
+        return self.get_expiry_date() - self._stored_expiry >= timedelta(
+            seconds=settings.SESSION_WRITE_INTERVAL)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if (not must_create and not self.modified
+                and self._stored_expiry is not None
+                and not self.refresh_due()):
+            return
+        DBStore.save(self, must_create)
+        expiry = self.get_expiry_date()
+        self._cache.set(self.cache_key, (self._session, expiry),
+                        self.get_expiry_age())
+        self._stored_expiry = expiry
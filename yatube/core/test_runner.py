@@ -0,0 +1,47 @@
+import copy
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def isolated_caches():
+    """Пустые кэши только для тестов.
+
+    Файловый кэш переносится во временный каталог, чтобы не делить его с
+    сервером разработки, остальные бэкенды получают свой префикс ключей.
+    """
+    directory = tempfile.mkdtemp(prefix='yatube_test_cache_')
+    test_caches = copy.deepcopy(settings.CACHES)
+    for alias, config in test_caches.items():
+        if config['BACKEND'].endswith('.FileBasedCache'):
+            config['LOCATION'] = os.path.join(directory, alias)
+        else:
+            config['KEY_PREFIX'] = f"{config.get('KEY_PREFIX', '')}_test"
+    try:
+        with override_settings(CACHES=test_caches):
+            # caches.all() возвращает только уже созданные кэши
+            for alias in settings.CACHES:
+                caches[alias].clear()
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class ClearCacheDiscoverRunner(DiscoverRunner):
+    """Запускает тесты на отдельных пустых кэшах."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._caches = ExitStack()
+        self._caches.enter_context(isolated_caches())
+
+    def teardown_test_environment(self, **kwargs):
+        self._caches.close()
+        super().teardown_test_environment(**kwargs)
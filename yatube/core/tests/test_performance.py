@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import performance
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def setUp(self):
+        performance.reset()
+        cache.clear()
+        self.guest_client = Client()
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """Ответ содержит замеры времени, SQL, шаблонов и кэша."""
+        response = self.guest_client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for metric in ('total;dur=', 'db;dur=', 'queries"', 'tpl;dur=',
+                       'cache;desc="hits='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, timing)
+
+    def test_server_timing_only_for_staff_by_default(self):
+        """Без SERVER_TIMING заголовок получает только персонал."""
+        address = reverse('posts:index')
+        self.assertNotIn('Server-Timing', self.guest_client.get(address))
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        self.assertIn('Server-Timing', staff_client.get(address))
+
+    def test_get_many_counted_once(self):
+        """get_many из BaseCache не считает ключи второй раз через get."""
+        cache.set('present', 1)
+        with performance.collect() as stats:
+            cache.get_many(['present', 'absent'])
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (1, 1))
+
+    def test_requests_aggregated_by_url_name(self):
+        """Запросы копятся в гистограмме по имени URL."""
+        for _ in range(3):
+            self.guest_client.get(reverse('posts:index'))
+        entry = performance.snapshot()['posts:index']
+        self.assertEqual(entry['requests'], 3)
+        self.assertEqual(sum(entry['buckets'].values()), 3)
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['cache_misses'], 0)
+        self.assertGreater(entry['template_ms'], 0)
+
+    def test_stats_endpoint_only_for_staff(self):
+        """Гистограммы видит только персонал."""
+        url = reverse('performance')
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        staff_client = Client()
+        staff_client.force_login(self.staff)
+        staff_client.get(reverse('posts:index'))
+        response = staff_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('posts:index', response.json())
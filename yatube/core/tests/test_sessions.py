@@ -0,0 +1,77 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.sessions import SessionStore
+
+
+class HybridSessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['answer'] = 42
+        session.save()
+        self.session_key = session.session_key
+
+    def test_session_read_from_cache(self):
+        """Сохраненная сессия читается из кэша без запросов к базе."""
+        with CaptureQueriesContext(connection) as queries:
+            session = SessionStore(self.session_key)
+            self.assertEqual(session['answer'], 42)
+        self.assertEqual(len(queries), 0)
+
+    def test_session_read_from_db_on_cache_miss(self):
+        """После вытеснения из кэша сессия читается из базы."""
+        cache.clear()
+        self.assertEqual(SessionStore(self.session_key)['answer'], 42)
+
+    def test_unchanged_session_not_written(self):
+        """Сохранение без изменений и продления не пишет в базу."""
+        session = SessionStore(self.session_key)
+        session['answer']
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertEqual(len(queries), 0)
+
+    def test_changed_session_written(self):
+        """Измененная сессия записывается в базу и кэш."""
+        session = SessionStore(self.session_key)
+        session['answer'] = 43
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(self.session_key)['answer'], 43)
+
+    @override_settings(SESSION_WRITE_INTERVAL=0)
+    def test_expiry_extension_written_after_interval(self):
+        """Продление срока пишется, когда прошел SESSION_WRITE_INTERVAL."""
+        stored = Session.objects.get(session_key=self.session_key)
+        session = SessionStore(self.session_key)
+        session['answer']
+        session.save()
+        self.assertGreater(
+            Session.objects.get(session_key=self.session_key).expire_date,
+            stored.expire_date)
+
+
+class PurgeSessionsCommandTests(TestCase):
+    def test_purge_removes_only_expired(self):
+        """Команда удаляет просроченные сессии пачками."""
+        now = timezone.now()
+        for number in range(5):
+            Session.objects.create(
+                session_key=f'expired{number}', session_data='',
+                expire_date=now - timedelta(days=1))
+        Session.objects.create(
+            session_key='active', session_data='',
+            expire_date=now + timedelta(days=1))
+        call_command('purge_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            list(Session.objects.values_list('session_key', flat=True)),
+            ['active'])
@@ -1,5 +1,9 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from . import performance
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -11,3 +15,15 @@ def csrf_failure(request, reason=''):
 
 def server_error(request):
     return render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def performance_stats(request):
+    """Гистограммы времени ответа текущего процесса по имени URL.
+
+    POST сбрасывает накопленные данные.
+    """
+    if request.method == 'POST':
+        performance.reset()
+    return JsonResponse(performance.snapshot(),
+                        json_dumps_params={'indent': 2})
@@ -1,6 +1,41 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
 
-from .models import Post, Group, Comment, Follow
+from .models import Post, Group, Comment, Follow, AuthorStats
+from .paginators import EstimatedCountPaginator
+from .search import filter_search
+
+
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """AutocompleteSelect, которому выбранный объект передается заранее.
+
+    В list_editable виджет рендерится в каждой строке, и обычный виджет
+    запрашивает выбранный объект отдельным запросом на строку.
+    """
+
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        obj = self.preloaded
+        if obj is None or str(obj.pk) not in value:
+            return super().optgroups(name, value, attr)
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, '', '', False, 0))
+        default[1].append(self.create_option(
+            name, obj.pk, self.choices.field.label_from_instance(obj),
+            True, len(default[1])))
+        return [default]
+
+
+class PostChangeListForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Группа уже загружена через list_select_related
+        widget = self.fields['group'].widget
+        widget = getattr(widget, 'widget', widget)
+        widget.preloaded = self.instance.group
 
 
 @admin.register(Post)
@@ -16,9 +51,38 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    date_hierarchy = 'pub_date'
+    ordering = ('-pub_date', '-pk')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по полнотекстовому индексу вместо ILIKE '%...%' по text
+        if not search_term.split():
+            return queryset, False
+        return filter_search(queryset, search_term), False
+
+
+@admin.register(Group)
+class GroupAdmin(admin.ModelAdmin):
+    search_fields = ('title', 'slug')
+
 
-admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(AuthorStats)
@@ -0,0 +1,164 @@
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import AuthorStats, Comment, Post
+
+VIEWS = (
+    'index', 'group_post', 'profile', 'post_detail', 'follow_index',
+    'my_follow', 'my_follower', 'add_comment',
+)
+
+
+def top(queryset, field):
+    """Значение field у самого «тяжелого» объекта выборки."""
+    return queryset.values_list(field, flat=True).first()
+
+
+class Scenarios:
+    """Запросы к представлениям на самых тяжелых объектах базы:
+    самый плодовитый автор, самая большая группа, самый обсуждаемый пост
+    и читатель с наибольшим числом подписок.
+    """
+
+    def __init__(self):
+        stats = AuthorStats.objects.select_related('user')
+        self.author = stats.order_by('-posts_count').first().user
+        self.reader = stats.order_by('-following_count').first().user
+        self.celebrity = stats.order_by('-followers_count').first().user
+        self.group_slug = top(
+            Post.objects.filter(group__isnull=False).values(
+                'group__slug').annotate(total=Count('pk')).order_by(
+                '-total'), 'group__slug')
+        self.post_id = top(
+            Comment.objects.values('post').annotate(
+                total=Count('pk')).order_by('-total'), 'post')
+        if self.post_id is None:
+            self.post_id = top(Post.objects.order_by('-pub_date'), 'pk')
+        # Вход выполняется заранее, чтобы не попасть в замер
+        self.clients = {None: Client()}
+        for user in (self.reader, self.celebrity):
+            self.clients[user] = Client()
+            self.clients[user].force_login(user)
+
+    def client(self, user=None):
+        return self.clients[user]
+
+    def index(self):
+        return self.client().get(reverse('posts:index'))
+
+    def group_post(self):
+        return self.client().get(
+            reverse('posts:group_list', args=[self.group_slug]))
+
+    def profile(self):
+        return self.client().get(
+            reverse('posts:profile', args=[self.author.username]))
+
+    def post_detail(self):
+        return self.client().get(
+            reverse('posts:post_detail', args=[self.post_id]))
+
+    def follow_index(self):
+        return self.client(self.reader).get(reverse('posts:follow_index'))
+
+    def my_follow(self):
+        return self.client(self.reader).get(reverse('posts:my_follow'))
+
+    def my_follower(self):
+        return self.client(self.celebrity).get(reverse('posts:my_follower'))
+
+    def add_comment(self):
+        # Комментарий откатывается, чтобы повторы не меняли данные
+        with transaction.atomic():
+            response = self.client(self.reader).post(
+                reverse('posts:add_comment', args=[self.post_id]),
+                {'text': 'Комментарий для замера'})
+            transaction.set_rollback(True)
+        return response
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(request, iterations, cold=False):
+    """Замер одного представления.
+
+    Возвращает перцентили времени ответа в миллисекундах, число SQL
+    запросов и пик выделенной памяти в КиБ. Первый запрос прогревает
+    кэш и считает SQL, память меряется отдельным запросом под
+    tracemalloc, чтобы трассировка не искажала время.
+    """
+    if cold:
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        response = request()
+    # captured_queries читается из лога соединения, который следующие
+    # запросы очищают
+    query_count = len(queries)
+    if response.status_code >= 400:
+        raise RuntimeError(f'Ответ {response.status_code}')
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        started = time.perf_counter()
+        request()
+        timings.append((time.perf_counter() - started) * 1000)
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        request()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'p99_ms': round(percentile(timings, 0.99), 2),
+        'queries': query_count,
+        'memory_kib': round(peak / 1024, 1),
+    }
+
+
+def run(views=VIEWS, iterations=20, cold=False):
+    scenarios = Scenarios()
+    return {
+        view: measure(getattr(scenarios, view), iterations, cold)
+        for view in views
+    }
+
+
+def regressions(results, baseline, tolerance, min_delta_ms):
+    """Строки с ухудшениями относительно baseline.
+
+    Время и память могут вырасти на долю tolerance (время — еще и не
+    меньше чем на min_delta_ms), число запросов расти не может.
+    """
+    problems = []
+    for view, result in results.items():
+        expected = baseline.get(view)
+        if expected is None:
+            continue
+        if result['queries'] > expected['queries']:
+            problems.append(
+                f'{view}: запросов {result["queries"]}, '
+                f'было {expected["queries"]}')
+        for metric in ('p95_ms', 'memory_kib'):
+            limit = expected[metric] * (1 + tolerance)
+            if metric == 'p95_ms':
+                limit = max(limit, expected[metric] + min_delta_ms)
+            if result[metric] > limit:
+                problems.append(
+                    f'{view}: {metric} {result[metric]}, '
+                    f'было {expected[metric]}, предел {limit:.1f}')
+    return problems
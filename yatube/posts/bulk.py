@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from .models import Comment, Post
+
+
+@contextmanager
+def keep_dates():
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now_add in zip(fields, saved):
+            field.auto_now_add = auto_now_add
+
+
+def bulk_create_batches(model, objects, batch_size, on_batch=None):
+    """Сохраняет objects пачками по batch_size, каждую в своей транзакции.
+
+    on_batch(total) вызывается после каждой пачки; возвращает число
+    сохраненных объектов.
+    """
+    total = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            total += _save_batch(model, batch)
+            batch = []
+            if on_batch is not None:
+                on_batch(total)
+    if batch:
+        total += _save_batch(model, batch)
+        if on_batch is not None:
+            on_batch(total)
+    return total
+
+
+def _save_batch(model, batch):
+    with transaction.atomic():
+        model.objects.bulk_create(batch)
+    return len(batch)
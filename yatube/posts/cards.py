@@ -0,0 +1,76 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .generations import generation_key, new_generation
+from .thumbnails import preload_thumbnails
+
+CARD_TEMPLATE = 'includes/post_template.html'
+CARD_KEY_PREFIX = 'post_card'
+
+
+def card_version_keys(post):
+    """Поколения, от которых зависит карточка: пост, группа, автор."""
+    keys = [
+        generation_key('post_card', post.pk),
+        generation_key('author_card', post.author_id),
+    ]
+    if post.group_id is not None:
+        keys.append(generation_key('group_card', post.group_id))
+    return keys
+
+
+class PostCards:
+    """HTML карточек страницы ленты.
+
+    Кэш читается одним get_many при первом обращении к любой карточке,
+    поэтому при попадании во внешний фрагмент ни запрос постов, ни кэш
+    карточек не выполняются.
+    """
+
+    def __init__(self, page_obj):
+        self.page_obj = page_obj
+        self.posts = None
+        self._cards = None
+
+    def get(self, post):
+        if self._cards is None:
+            self.posts = list(self.page_obj)
+            self._cards = self.load()
+        return self._cards[post.pk]
+
+    def get_versions(self):
+        keys = {key for post in self.posts for key in card_version_keys(post)}
+        versions = cache.get_many(keys)
+        for key in keys - versions.keys():
+            cache.add(key, new_generation(), None)
+            versions[key] = cache.get(key)
+        return versions
+
+    def load(self):
+        versions = self.get_versions()
+        card_keys = {
+            post.pk: ':'.join(
+                [CARD_KEY_PREFIX, str(post.pk)]
+                + [str(versions[key]) for key in card_version_keys(post)])
+            for post in self.posts
+        }
+        cached = cache.get_many(card_keys.values())
+        misses = [
+            post for post in self.posts if card_keys[post.pk] not in cached]
+        thumbnails = preload_thumbnails(
+            [post.image for post in misses if post.image])
+        cards = {}
+        rendered = {}
+        for post in self.posts:
+            key = card_keys[post.pk]
+            html = cached.get(key)
+            if html is None:
+                html = render_to_string(
+                    CARD_TEMPLATE, {'post': post, 'thumbnails': thumbnails})
+                rendered[key] = html
+            cards[post.pk] = mark_safe(html)
+        if rendered:
+            cache.set_many(rendered, settings.FRAGMENT_CACHE_TIMEOUT)
+        return cards
@@ -0,0 +1,138 @@
+"""ETag и кэш целых страниц для лент и страницы поста.
+
+ETag собирается из поколений posts.generations, которые сдвигаются при
+любом изменении показанных данных, в том числе при правке и удалении
+постов. Поколения лежат в кэше, поэтому проверка стоит не больше одного
+запроса по индексу, а совпавший ETag отдает 304 без рендера шаблонов.
+Тот же ETag входит в ключ кэша страниц для анонимных читателей: запись
+поста или комментария сдвигает поколение, и старые страницы больше не
+читаются.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .generations import get_generation
+from .models import Group, Post, User
+
+
+def first_value(queryset, field):
+    # Без order_by: модели Post сортировка по дате тут не нужна
+    return next(iter(
+        queryset.order_by().values_list(field, flat=True)[:1]), None)
+
+
+def page_etag(request, *generations):
+    """ETag страницы с поколениями generations — пар (scope, pk).
+
+    Кроме данных страница вошедшего пользователя зависит от него самого
+    (шапка, кнопка подписки) и его CSRF cookie, которым подписана форма
+    комментария. Анонимные читатели видят одну и ту же страницу.
+    """
+    user = request.user
+    parts = []
+    if user.is_authenticated:
+        parts += [
+            user.pk,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            get_generation('follows', user.pk),
+        ]
+    parts += [get_generation(scope, pk) for scope, pk in generations]
+    return hashlib.md5(
+        ':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def index_etag(request):
+    return page_etag(request, ('index', None))
+
+
+def group_post_etag(request, slug):
+    group_id = first_value(Group.objects.filter(slug=slug), 'pk')
+    if group_id is None:
+        return None
+    return page_etag(request, ('group', group_id))
+
+
+def profile_etag(request, username):
+    author_id = first_value(User.objects.filter(username=username), 'pk')
+    if author_id is None:
+        return None
+    return page_etag(request, ('profile', author_id))
+
+
+def post_detail_etag(request, post_id):
+    # Поколение профиля автора сдвигается с его новыми постами и
+    # переименованием автора или группы, которые видны на странице поста
+    author_id = first_value(Post.objects.filter(pk=post_id), 'author_id')
+    if author_id is None:
+        return None
+    return page_etag(request, ('post', post_id), ('profile', author_id))
+
+
+def is_anonymous_read(request):
+    # Без cookie сессии пользователь точно не вошел
+    return (request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES)
+
+
+def page_cache_key(request, etag):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page:{etag}:{path}'
+
+
+def cached_page(view, etag):
+    """Представление, берущее страницу анонимного читателя из кэша."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = page_cache_key(request, etag)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            # Страница с CSRF токеном требует cookie, которого нет в кэше
+            if (response.status_code == 200
+                    and not request.META.get('CSRF_COOKIE_USED')):
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
+
+
+def conditional_page(etag_func):
+    """condition(etag_func) и кэш страниц для анонимных читателей.
+
+    Анонимный запрос не читает сессию. Ответ помечается public на
+    PAGE_CACHE_MAX_AGE секунд для общих кэшей, а браузер перепроверяет его
+    по ETag, который после входа уже не совпадет. Vary: Cookie ставится
+    явно, чтобы CDN или прокси не отдали анонимную страницу вошедшему
+    пользователю; nginx из infra/ вместо этого обходит кэш по cookie
+    сессии. Остальные ответы — private с обязательной перепроверкой.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not is_anonymous_read(request):
+                response = conditional_view(request, *args, **kwargs)
+                patch_cache_control(response, private=True, no_cache=True)
+                return response
+            # Без cookie сессии пользователь аноним, ленивый request.user
+            # прочитал бы сессию
+            request.user = AnonymousUser()
+            etag = etag_func(request, *args, **kwargs)
+            if etag is None:
+                return view(request, *args, **kwargs)
+            response = condition(etag_func=lambda *args, **kwargs: etag)(
+                cached_page(view, etag))(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                patch_cache_control(
+                    response, public=True, max_age=0,
+                    s_maxage=settings.PAGE_CACHE_MAX_AGE)
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
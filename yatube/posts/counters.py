@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+
+COUNT_KEY_PREFIX = 'posts_count'
+
+
+def feed_count_key(feed, pk=None):
+    """Ключ кэша с числом постов ленты: all, group, author или follow."""
+    if pk is None:
+        return f'{COUNT_KEY_PREFIX}:{feed}'
+    return f'{COUNT_KEY_PREFIX}:{feed}:{pk}'
+
+
+def get_feed_count(key, queryset):
+    """Число постов ленты из кэша; COUNT(*) выполняется только при промахе."""
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.POSTS_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_post_counts(author_id, group_ids=()):
+    """Сбрасывает счетчики лент, в которые попадает пост автора."""
+    from .models import Follow
+
+    keys = [feed_count_key('all'), feed_count_key('author', author_id)]
+    keys += [
+        feed_count_key('group', group_id)
+        for group_id in set(group_ids) if group_id is not None
+    ]
+    keys += [
+        feed_count_key('follow', user_id)
+        for user_id in Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True)
+    ]
+    cache.delete_many(keys)
+
+
+def invalidate_follow_count(user_id):
+    cache.delete(feed_count_key('follow', user_id))
@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Post, Comment
+from .uploads import downsize_image, validate_image_upload
 
 
 class PostForm(forms.ModelForm):
@@ -8,6 +10,13 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        validate_image_upload(image)
+        return downsize_image(image)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
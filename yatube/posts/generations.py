@@ -0,0 +1,61 @@
+import time
+
+from django.core.cache import cache
+
+GENERATION_KEY_PREFIX = 'generation'
+
+
+def generation_key(scope, pk=None):
+    """Ключ счетчика поколений: index, group, profile или post."""
+    if pk is None:
+        return f'{GENERATION_KEY_PREFIX}:{scope}'
+    return f'{GENERATION_KEY_PREFIX}:{scope}:{pk}'
+
+
+def new_generation():
+    # Начальное значение по времени: после вытеснения ключа из кэша
+    # поколение не совпадет со старыми фрагментами.
+    return int(time.time() * 1000)
+
+
+def get_generation(scope, pk=None):
+    """Текущее поколение данных; входит в ключ кэша фрагментов."""
+    key = generation_key(scope, pk)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generations(keys):
+    """Сдвигает поколения, делая недействительными фрагменты с ними."""
+    for key in set(keys):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, new_generation(), None)
+
+
+def post_feed_generations(post):
+    """Поколения лент, в которых показывается пост."""
+    keys = [generation_key('index'), generation_key('profile', post.author_id)]
+    initial_group_id = getattr(post, '_initial_group_id', None)
+    keys += [
+        generation_key('group', group_id)
+        for group_id in {post.group_id, initial_group_id}
+        if group_id is not None
+    ]
+    return keys
+
+
+def post_card_generations(image_name):
+    """Поколения карточек и лент постов с картинкой image_name."""
+    from .models import Post
+
+    keys = []
+    for post in Post.objects.filter(image=image_name).only(
+            'pk', 'author_id', 'group_id'):
+        keys += post_feed_generations(post)
+        keys.append(generation_key('post_card', post.pk))
+    return keys
@@ -0,0 +1,32 @@
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.kvstores.cached_db_kvstore import (
+    EMPTY_VALUE, KVStore as CachedDBKVStore
+)
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+
+class KVStore(CachedDBKVStore):
+    """Key-value store sorl в общем кэше с пакетным чтением."""
+
+    def get_many(self, image_files):
+        """Возвращает {image_file.key: ImageFile или None} за один запрос
+        к кэшу и не больше одного запроса к базе для промахов.
+        """
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        values = self.cache.get_many(keys)
+        missing = keys.keys() - values.keys()
+        if missing:
+            found = dict(KVStoreModel.objects.filter(
+                key__in=missing).values_list('key', 'value'))
+            fetched = {key: found.get(key, EMPTY_VALUE) for key in missing}
+            self.cache.set_many(fetched, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(fetched)
+        return {
+            keys[key]: (
+                None if value == EMPTY_VALUE or not value
+                else deserialize_image_file(value))
+            for key, value in values.items()
+        }
@@ -0,0 +1,81 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from posts import benchmarks
+from posts.models import AuthorStats, Post
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+COLUMNS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'memory_kib')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время ответа, число SQL запросов и память публичных '
+            'представлений на текущей базе и сравнивает с baseline')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--views', nargs='+', choices=benchmarks.VIEWS,
+            default=benchmarks.VIEWS,
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Сколько раз запрашивать каждое представление',
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэш перед каждым запросом',
+        )
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новый baseline',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост времени и памяти, доля от baseline',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=2,
+            help='Рост p95 меньше этого значения не считается регрессией',
+        )
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists() or not AuthorStats.objects.exists():
+            raise CommandError(
+                'В базе нет данных, сначала запустите generate_data')
+        # Client обращается к хосту testserver
+        with override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            results = benchmarks.run(
+                options['views'], options['iterations'], options['cold'])
+        self.write_table(results)
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Baseline записан в {options["baseline"]}'))
+            return
+        if not os.path.exists(options['baseline']):
+            self.stdout.write(self.style.WARNING(
+                'Baseline не найден, сравнение пропущено'))
+            return
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+        problems = benchmarks.regressions(
+            results, baseline, options['tolerance'],
+            options['min_delta_ms'])
+        if problems:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def write_table(self, results):
+        self.stdout.write(
+            f'{"view":<14}' + ''.join(f'{column:>12}' for column in COLUMNS))
+        for view, result in results.items():
+            self.stdout.write(f'{view:<14}' + ''.join(
+                f'{result[column]:>12}' for column in COLUMNS))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from posts.models import Comment, Follow, Group, Post
+
+# Порядок выгрузки: записи ссылаются только на уже выгруженные
+EXPORTS = (
+    ('group', Group.objects, ('pk', 'title', 'slug', 'description')),
+    ('post', Post.objects, (
+        'pk', 'text', 'pub_date', 'author__username', 'group_id', 'image')),
+    ('comment', Comment.objects, (
+        'pk', 'post_id', 'author__username', 'text', 'created')),
+    ('follow', Follow.objects, ('user__username', 'author__username')),
+)
+FIELD_NAMES = {
+    'author__username': 'author',
+    'user__username': 'user',
+    'group_id': 'group',
+    'post_id': 'post',
+}
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки в NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-',
+            help='Файл для записи, по умолчанию stdout',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if options['output'] == '-':
+            self.export(self.stdout, chunk_size)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                self.export(output, chunk_size)
+
+    def export(self, output, chunk_size):
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for model, manager, fields in EXPORTS:
+            names = [FIELD_NAMES.get(field, field) for field in fields]
+            rows = manager.order_by('pk').values_list(*fields).iterator(
+                chunk_size=chunk_size)
+            total = 0
+            for total, row in enumerate(rows, 1):
+                record = {'model': model, **dict(zip(names, row))}
+                output.write(encoder.encode(record) + '\n')
+                if total % chunk_size == 0:
+                    self.stderr.write(f'{model}: {total}')
+            self.stderr.write(self.style.SUCCESS(
+                f'{model}: выгружено {total}'))
@@ -0,0 +1,221 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from posts.bulk import bulk_create_batches, keep_dates
+from posts.models import Comment, Follow, Group, Post, User
+from posts.thumbnails import image_storage
+from posts.timeline import backfill_timelines
+
+WORDS = (
+    'автор пост группа лента день город утро вечер дорога книга музыка '
+    'фильм кофе море горы работа проект код идея встреча новость фото '
+    'погода выходные путешествие друзья семья история вопрос ответ '
+    'сегодня вчера завтра очень хорошо интересно быстро медленно новый '
+    'старый первый последний большой маленький красивый важный'
+).split()
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса закона Ципфа: первый элемент самый популярный."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)))
+
+
+def random_text(rng, min_words, max_words):
+    text = ' '.join(rng.choices(WORDS, k=rng.randint(min_words, max_words)))
+    return text.capitalize() + '.'
+
+
+class Command(BaseCommand):
+    help = ('Создает синтетические данные для нагрузочного тестирования: '
+            'пользователей, группы, посты, подписки, комментарии и картинки')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=float, default=20,
+            help='Среднее число подписок пользователя',
+        )
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок создать',
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.2,
+            help='Доля постов с картинкой',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для популярности авторов',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить даты постов',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пачки для bulk_create',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        user_ids = self.create_users()
+        group_ids = self.create_groups()
+        images = self.create_images()
+        # Популярность авторов: порядок случайный, веса по Ципфу
+        self.rng.shuffle(user_ids)
+        author_weights = zipf_weights(len(user_ids), options['skew'])
+        with keep_dates():
+            posts = self.create_posts(
+                user_ids, author_weights, group_ids, images)
+            self.create_comments(user_ids, posts)
+        self.create_follows(user_ids, author_weights)
+        call_command('rebuild_author_stats', batch_size=self.batch_size,
+                     stdout=self.stdout)
+        self.fill_timelines()
+        # Данные созданы в обход сигналов, кэш фрагментов и счетчиков устарел
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
+
+    def pick(self, population, cum_weights):
+        return self.rng.choices(population, cum_weights=cum_weights)[0]
+
+    def progress(self, model):
+        return lambda total: self.stdout.write(f'{model}: {total}')
+
+    def create_users(self):
+        start = User.objects.aggregate(start=Max('pk'))['start'] or 0
+        password = make_password(None)
+        bulk_create_batches(
+            User,
+            (User(username=f'user{number}', password=password)
+             for number in range(start, start + self.options['users'])),
+            self.batch_size, self.progress('user'))
+        return list(User.objects.values_list('pk', flat=True))
+
+    def create_groups(self):
+        start = Group.objects.aggregate(start=Max('pk'))['start'] or 0
+        bulk_create_batches(
+            Group,
+            (Group(title=f'Группа {number}', slug=f'group-{number}',
+                   description=random_text(self.rng, 5, 30))
+             for number in range(start, start + self.options['groups'])),
+            self.batch_size, self.progress('group'))
+        return list(Group.objects.values_list('pk', flat=True))
+
+    def create_images(self):
+        storage = image_storage()
+        names = []
+        for number in range(self.options['images']):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = BytesIO()
+            Image.new('RGB', (1200, 800), color).save(buffer, 'JPEG')
+            names.append(storage.save(f'posts/generated-{number}.jpg',
+                                      ContentFile(buffer.getvalue())))
+        return names
+
+    def create_posts(self, user_ids, author_weights, group_ids, images):
+        rng = self.rng
+        group_weights = zipf_weights(len(group_ids), 1) if group_ids else None
+        seconds = self.options['days'] * 24 * 60 * 60
+
+        def posts():
+            for _ in range(self.options['posts']):
+                group_id = None
+                if group_ids and rng.random() < 0.7:
+                    group_id = self.pick(group_ids, group_weights)
+                image = ''
+                if images and rng.random() < self.options['image_ratio']:
+                    image = rng.choice(images)
+                yield Post(
+                    text=random_text(rng, 5, 120),
+                    pub_date=self.now - timedelta(
+                        seconds=rng.randrange(max(seconds, 1))),
+                    author_id=self.pick(user_ids, author_weights),
+                    group_id=group_id,
+                    image=image,
+                )
+
+        bulk_create_batches(Post, posts(), self.batch_size,
+                            self.progress('post'))
+        return list(Post.objects.order_by('-pub_date').values_list(
+            'pk', 'pub_date'))
+
+    def create_comments(self, user_ids, posts):
+        """posts — пары (id, pub_date) от новых к старым."""
+        if not posts:
+            return
+        rng = self.rng
+        # Свежие посты комментируют чаще
+        post_weights = zipf_weights(len(posts), 0.8)
+
+        def comments():
+            for _ in range(self.options['comments']):
+                post_id, pub_date = self.pick(posts, post_weights)
+                age = (self.now - pub_date).total_seconds()
+                yield Comment(
+                    post_id=post_id,
+                    author_id=rng.choice(user_ids),
+                    text=random_text(rng, 1, 30),
+                    created=pub_date + timedelta(
+                        seconds=rng.uniform(0, age)),
+                )
+
+        bulk_create_batches(Comment, comments(), self.batch_size,
+                            self.progress('comment'))
+
+    def create_follows(self, user_ids, author_weights):
+        """Степенной граф подписок: число подписок пользователя по Парето,
+        авторы выбираются по популярности.
+        """
+        rng = self.rng
+        mean = self.options['follows']
+        existing = set(Follow.objects.values_list('user_id', 'author_id'))
+        alpha = 1.5  # среднее paretovariate(1.5) равно 3
+
+        def follows():
+            for user_id in user_ids:
+                count = min(len(user_ids) - 1,
+                            int(rng.paretovariate(alpha) * mean / 3))
+                authors = set()
+                for _ in range(count * 3):
+                    if len(authors) >= count:
+                        break
+                    author_id = self.pick(user_ids, author_weights)
+                    if (author_id != user_id
+                            and (user_id, author_id) not in existing):
+                        authors.add(author_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        bulk_create_batches(Follow, follows(), self.batch_size,
+                            self.progress('follow'))
+
+    def fill_timelines(self):
+        batch = []
+        for follow in Follow.objects.only(
+                'user_id', 'author_id').iterator(chunk_size=self.batch_size):
+            batch.append(follow)
+            if len(batch) >= self.batch_size:
+                backfill_timelines(batch)
+                batch = []
+        backfill_timelines(batch)
+        self.stdout.write('Ленты подписок заполнены')
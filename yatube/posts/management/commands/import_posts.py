@@ -0,0 +1,198 @@
+import json
+import sys
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import keep_dates
+from posts.counters import feed_count_key, invalidate_post_counts
+from posts.generations import (
+    bump_generations, generation_key, post_feed_generations
+)
+from posts.models import Comment, Follow, Group, Post, User
+from posts.timeline import backfill_timelines, fan_out_posts
+
+MODELS = {
+    'group': Group,
+    'post': Post,
+    'comment': Comment,
+    'follow': Follow,
+}
+
+
+def parse_date(value):
+    return parse_datetime(value) if value else timezone.now()
+
+
+class Command(BaseCommand):
+    help = 'Загружает группы, посты, комментарии и подписки из NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input', nargs='?', default='-',
+            help='Файл NDJSON из export_posts, по умолчанию stdin',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пачки для bulk_create и одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.user_ids = {}
+        self.totals = Counter()
+        self.post_ids = []
+        self.follows = []
+        if options['input'] == '-':
+            self.load(sys.stdin)
+        else:
+            with open(options['input'], encoding='utf-8') as lines:
+                self.load(lines)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [User, *MODELS.values()]):
+                cursor.execute(sql)
+        # bulk_create не отправляет сигналы, которые ведут счетчики
+        call_command('rebuild_author_stats', batch_size=self.batch_size,
+                     stdout=self.stdout)
+        # Раскладка зависит от числа подписчиков автора, поэтому идет
+        # после пересчета статистики
+        self.fan_out()
+        summary = ', '.join(
+            f'{model}: {total}' for model, total in self.totals.items())
+        self.stdout.write(self.style.SUCCESS(f'Загружено {summary}'))
+
+    def load(self, lines):
+        model = None
+        batch = []
+        with keep_dates():
+            for number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    raise CommandError(f'Строка {number}: некорректный JSON')
+                kind = record.pop('model', None)
+                if kind not in MODELS:
+                    raise CommandError(
+                        f'Строка {number}: неизвестная модель {kind}')
+                if kind != model or len(batch) >= self.batch_size:
+                    self.flush(model, batch)
+                    model, batch = kind, []
+                batch.append(record)
+            self.flush(model, batch)
+
+    def fan_out(self):
+        for start in range(0, len(self.post_ids), self.batch_size):
+            fan_out_posts(list(Post.objects.filter(
+                pk__in=self.post_ids[start:start + self.batch_size],
+            ).only('pk', 'author_id')))
+        for start in range(0, len(self.follows), self.batch_size):
+            backfill_timelines([
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in
+                self.follows[start:start + self.batch_size]
+            ])
+
+    def flush(self, model, records):
+        if not records:
+            return
+        try:
+            with transaction.atomic():
+                objects = getattr(self, f'build_{model}')(records)
+                MODELS[model].objects.bulk_create(objects)
+                getattr(self, f'imported_{model}')(objects)
+        except (KeyError, ValueError, IntegrityError) as error:
+            raise CommandError(f'{model}: {error!r}')
+        self.totals[model] += len(objects)
+        self.stdout.write(f'{model}: {self.totals[model]}')
+
+    def resolve_users(self, usernames):
+        """id пользователей по username; недостающие создаются без пароля."""
+        missing = set(usernames) - self.user_ids.keys()
+        if missing:
+            existing = dict(User.objects.filter(
+                username__in=missing).values_list('username', 'pk'))
+            User.objects.bulk_create(
+                User(username=username, password=make_password(None))
+                for username in missing - existing.keys())
+            self.user_ids.update(User.objects.filter(
+                username__in=missing).values_list('username', 'pk'))
+        return self.user_ids
+
+    def build_group(self, records):
+        return [
+            Group(pk=record['pk'], title=record['title'],
+                  slug=record['slug'], description=record['description'])
+            for record in records
+        ]
+
+    def build_post(self, records):
+        user_ids = self.resolve_users(
+            record['author'] for record in records)
+        return [
+            Post(pk=record['pk'], text=record['text'],
+                 pub_date=parse_date(record.get('pub_date')),
+                 author_id=user_ids[record['author']],
+                 group_id=record.get('group'),
+                 image=record.get('image') or '')
+            for record in records
+        ]
+
+    def build_comment(self, records):
+        user_ids = self.resolve_users(
+            record['author'] for record in records)
+        return [
+            Comment(pk=record['pk'], post_id=record['post'],
+                    author_id=user_ids[record['author']],
+                    text=record['text'],
+                    created=parse_date(record.get('created')))
+            for record in records
+        ]
+
+    def build_follow(self, records):
+        user_ids = self.resolve_users(
+            username for record in records
+            for username in (record['user'], record['author']))
+        return [
+            Follow(user_id=user_ids[record['user']],
+                   author_id=user_ids[record['author']])
+            for record in records
+        ]
+
+    # То же, что сигналы posts.signals делают для одиночных записей
+
+    def imported_group(self, groups):
+        bump_generations(
+            generation_key(scope, group.pk)
+            for group in groups for scope in ('group', 'group_card'))
+
+    def imported_post(self, posts):
+        self.post_ids.extend(post.pk for post in posts)
+        bump_generations(
+            key for post in posts for key in post_feed_generations(post))
+        group_ids = {}
+        for post in posts:
+            group_ids.setdefault(post.author_id, set()).add(post.group_id)
+        for author_id, groups in group_ids.items():
+            invalidate_post_counts(author_id, groups)
+
+    def imported_comment(self, comments):
+        bump_generations(
+            generation_key('post', comment.post_id) for comment in comments)
+
+    def imported_follow(self, follows):
+        self.follows.extend(
+            (follow.user_id, follow.author_id) for follow in follows)
+        cache.delete_many(list({
+            feed_count_key('follow', follow.user_id) for follow in follows}))
+        bump_generations(
+            generation_key('follows', follow.user_id) for follow in follows)
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts.models import AuthorStats, Follow, Post, User
+
+
+def counts(queryset, field):
+    return dict(queryset.values_list(field).annotate(Count('pk')).order_by())
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики постов, подписчиков и подписок авторов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Размер пачки для bulk_create',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = counts(Post.objects, 'author')
+        followers = counts(Follow.objects, 'author')
+        following = counts(Follow.objects, 'user')
+        with transaction.atomic():
+            # Отметка о сборке ленты при чтении — не счетчик, ее сохраняем
+            fan_in = set(AuthorStats.objects.filter(
+                fan_in=True).values_list('user_id', flat=True))
+            AuthorStats.objects.all().delete()
+            batch = []
+            total = 0
+            for user_id in User.objects.values_list(
+                    'pk', flat=True).iterator(chunk_size=batch_size):
+                batch.append(AuthorStats(
+                    user_id=user_id,
+                    posts_count=posts.get(user_id, 0),
+                    followers_count=followers.get(user_id, 0),
+                    following_count=following.get(user_id, 0),
+                    fan_in=user_id in fan_in,
+                ))
+                if len(batch) >= batch_size:
+                    AuthorStats.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            AuthorStats.objects.bulk_create(batch)
+            total += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитана статистика {total} авторов'))
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:25
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    followers = {}
+    for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id').iterator():
+        followers.setdefault(author_id, []).append(user_id)
+    for author_id, user_ids in followers.items():
+        post_ids = list(Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date').values_list('pk', flat=True)[
+                :settings.TIMELINE_BACKFILL_LIMIT])
+        entries = (
+            TimelineEntry(user_id=user_id, post_id=post_id)
+            for user_id in user_ids for post_id in post_ids)
+        # Без batch_size Django сам делит пачку по пределу базы
+        while True:
+            batch = list(islice(entries, settings.TIMELINE_BATCH_SIZE))
+            if not batch:
+                break
+            TimelineEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0002_authorstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Ленты подписок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_fan_in_authors(apps, schema_editor):
+    # Посты этих авторов уже пропускали раскладку по лентам
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    AuthorStats.objects.filter(
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).update(fan_in=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorstats',
+            name='fan_in',
+            field=models.BooleanField(default=False, verbose_name='Лента собирается при чтении'),
+        ),
+        migrations.RunPython(mark_fan_in_authors, migrations.RunPython.noop),
+    ]
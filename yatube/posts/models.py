@@ -1,6 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.db.models import Q, F, CheckConstraint, UniqueConstraint
+from django.db.models.functions import Greatest
+
+from .storage import ContentAddressedStorage
 
 
 User = get_user_model()
@@ -37,11 +40,21 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True,
+        db_index=True,
     )
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+        ]
         verbose_name_plural = 'Публикации авторов'
 
     def __str__(self):
@@ -96,6 +109,10 @@ class Comment(models.Model):
         return self.post
 
     class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created'],
+                         name='comment_post_created_idx'),
+        ]
         verbose_name_plural = 'Комментарии'
 
 
@@ -117,8 +134,89 @@ class Follow(models.Model):
             CheckConstraint(check=~Q(user=F('author')),
                             name='subscribe_to_yourself')
         ]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx'),
+        ]
 
         verbose_name_plural = 'Подписки'
 
     def __str__(self):
         return f'{self.user} -> {self.author}'
+
+
+class AuthorStats(models.Model):
+    """Денормализованные счетчики пользователя.
+
+    Обновляются сигналами при записи Post и Follow, пересобираются
+    командой rebuild_author_stats. fan_in отмечает автора, посты которого
+    хотя бы раз не разложились по лентам (см. posts.timeline).
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Всего постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписок'
+    )
+    fan_in = models.BooleanField(
+        default=False,
+        verbose_name='Лента собирается при чтении'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+    @classmethod
+    def change(cls, user_id, field, delta):
+        """Атомарно изменяет счетчик field пользователя на delta.
+
+        Счетчик не опускается ниже нуля: после bulk_create без сигналов он
+        может отставать до rebuild_author_stats.
+        """
+        with transaction.atomic():
+            updated = cls.objects.filter(user_id=user_id).update(
+                **{field: Greatest(F(field) + delta, 0)})
+            if not updated and delta > 0:
+                cls.objects.get_or_create(user_id=user_id)
+                cls.objects.filter(user_id=user_id).update(
+                    **{field: F(field) + delta})
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries'
+    )
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['user', 'post'],
+                             name='unique_timeline_entry'),
+        ]
+        verbose_name_plural = 'Ленты подписок'
+
+    def __str__(self):
+        return f'{self.user} <- {self.post_id}'
@@ -0,0 +1,192 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .counters import get_feed_count
+
+
+class CursorPage(Page):
+    """Страница ленты, полученная по курсору, а не по номеру."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, cursor, paginator,
+                 has_next=False, has_previous=False):
+        super().__init__(object_list, 1, paginator)
+        self.cursor = cursor or ''
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            CursorPaginator.NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(
+            CursorPaginator.PREVIOUS, self.object_list[0])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, берущий общее число объектов из кэша счетчиков лент.
+
+    Без count_key ведет себя как обычный Paginator.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        return get_feed_count(self.count_key, self.object_list)
+
+    def page(self, number):
+        # Срез не обрезается по count: приблизительный счетчик не должен
+        # терять посты на последней странице.
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator для больших таблиц в админке.
+
+    Для нефильтрованной выборки в PostgreSQL число строк берется из
+    статистики планировщика (pg_class.reltuples) вместо COUNT(*) по всей
+    таблице; маленькие таблицы и остальные случаи считаются как обычно.
+    """
+
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return super().count
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row is None or row[0] < self.exact_count_limit:
+            return super().count
+        return int(row[0])
+
+
+class CursorPaginator(CachedCountPaginator):
+    """Keyset-пагинация по паре (key_field, id), по умолчанию (pub_date, id).
+
+    Вместо OFFSET/LIMIT и COUNT(*) каждая страница выбирается условием
+    по ключу последнего показанного поста, поэтому страница N стоит
+    столько же, сколько первая.
+    """
+
+    NEXT = 'n'
+    PREVIOUS = 'p'
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 key_field='pub_date'):
+        super().__init__(object_list, per_page, count_key=count_key)
+        self.key_field = key_field
+
+    def encode_value(self, value):
+        return value.isoformat()
+
+    def decode_value(self, value):
+        return parse_datetime(value)
+
+    def encode_cursor(self, direction, obj):
+        value = self.encode_value(getattr(obj, self.key_field))
+        raw = f'{direction}|{value}|{obj.pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (direction, value, pk) или None для битого курсора."""
+        if not cursor:
+            return None
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(cursor + padding).decode()
+            direction, value, pk = raw.split('|')
+            value = self.decode_value(value)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if direction not in (self.NEXT, self.PREVIOUS) or value is None:
+            return None
+        return direction, value, pk
+
+    def first_page(self):
+        queryset = self.object_list.order_by(f'-{self.key_field}', '-pk')
+        items = list(queryset[:self.per_page + 1])
+        return CursorPage(items[:self.per_page], '', self,
+                          has_next=len(items) > self.per_page)
+
+    def get_page(self, cursor):
+        """Возвращает страницу по курсору.
+
+        Битый курсор и курсор, за которым постов уже нет (устарел после
+        удаления или подделан), дают первую страницу.
+        """
+        position = self.decode_cursor(cursor)
+        if position is None:
+            return self.first_page()
+        direction, value, pk = position
+        field = self.key_field
+        if direction == self.NEXT:
+            queryset = self.object_list.filter(
+                Q(**{f'{field}__lt': value})
+                | Q(**{field: value, 'pk__lt': pk})
+            ).order_by(f'-{field}', '-pk')
+            items = list(queryset[:self.per_page + 1])
+            has_next = len(items) > self.per_page
+            items, has_previous = items[:self.per_page], True
+        else:
+            queryset = self.object_list.filter(
+                Q(**{f'{field}__gt': value})
+                | Q(**{field: value, 'pk__gt': pk})
+            ).order_by(field, 'pk')
+            items = list(queryset[:self.per_page + 1])
+            has_previous = len(items) > self.per_page
+            items, has_next = items[:self.per_page][::-1], True
+        if not items:
+            return self.first_page()
+        return CursorPage(items, cursor, self,
+                          has_next=has_next, has_previous=has_previous)
+
+
+class RankCursorPaginator(CursorPaginator):
+    """Keyset-пагинация результатов поиска по паре (rank, id)."""
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page, key_field='rank')
+
+    def encode_value(self, value):
+        return repr(value)
+
+    def decode_value(self, value):
+        return float(value)
@@ -0,0 +1,15 @@
+# Наибольшее число SQL запросов представления при пустом кэше, включая
+# чтение сессии и пользователя. Не зависит от числа объектов на странице.
+# group_list, profile и post_detail тратят один запрос на ETag.
+QUERY_BUDGETS = {
+    'posts:index': 3,
+    'posts:group_list': 5,
+    'posts:profile': 8,
+    'posts:post_detail': 4,
+    'posts:search': 2,
+    'posts:follow_index': 6,
+    'posts:my_follow': 4,
+    'posts:my_follower': 4,
+    'posts:post_create': 3,
+    'posts:add_comment': 5,
+}
@@ -0,0 +1,112 @@
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVectorField
+)
+from django.db import connection, connections
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'posts_post_fts'
+
+# Таблица FTS5 хранит только индекс, текст берется из posts_post.
+# SQLite удаляет триггеры вместе с таблицей, а Django пересоздает
+# posts_post при изменении полей, поэтому триггеры создаются заново
+# после каждой миграции.
+SQLITE_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert "
+    "AFTER INSERT ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete "
+    "AFTER DELETE ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update "
+    "AFTER UPDATE OF text ON posts_post BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+]
+
+
+def install_search_triggers(using):
+    """Создает недостающие триггеры FTS5 в базе using."""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def fts_query(query):
+    """Запрос FTS5 из слов пользователя: каждое слово в кавычках, чтобы
+    операторы FTS5 в тексте не ломали разбор.
+    """
+    return ' '.join(
+        '"{}"'.format(word.replace('"', '""')) for word in query.split())
+
+
+class RawSubquery(RawSQL):
+    """Подзапрос для pk__in: скобки вокруг него добавляет сам lookup,
+    а RawSQL добавил бы вторые, и IN ((...)) сравнивал бы с одним
+    значением.
+    """
+
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+def filter_search(queryset, query):
+    """Посты queryset, в тексте которых есть все слова query.
+
+    PostgreSQL ищет по GIN-индексу колонки search_vector, SQLite — по
+    виртуальной таблице FTS5; остальные базы — через icontains. Колонки
+    и таблицы индекса нет в модели, поэтому id подходящих постов
+    выбираются подзапросом.
+    """
+    if connection.vendor == 'postgresql':
+        post_ids = RawSubquery(
+            'SELECT id FROM posts_post '
+            'WHERE search_vector @@ plainto_tsquery(%s::regconfig, %s)',
+            [SEARCH_CONFIG, query])
+    elif connection.vendor == 'sqlite':
+        post_ids = RawSubquery(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            [fts_query(query)])
+    else:
+        for word in query.split():
+            queryset = queryset.filter(text__icontains=word)
+        return queryset
+    return queryset.filter(pk__in=post_ids)
+
+
+def search_rank(query):
+    """Релевантность поста для query: чем больше, тем выше в выдаче."""
+    if connection.vendor == 'postgresql':
+        vector = RawSQL('posts_post.search_vector', [],
+                        output_field=SearchVectorField())
+        # ts_rank возвращает real: без приведения к float8 значение из
+        # курсора не совпадет с рангом в базе
+        return Cast(
+            SearchRank(vector, SearchQuery(query, config=SEARCH_CONFIG)),
+            FloatField())
+    if connection.vendor == 'sqlite':
+        # bm25 возвращает отрицательные значения: лучшие — меньше
+        return RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = posts_post.id',
+            [fts_query(query)], output_field=FloatField())
+    return RawSQL('0', [], output_field=FloatField())
+
+
+def search_posts(queryset, query):
+    """Посты queryset, подходящие под query, с аннотацией rank."""
+    if not query.split():
+        return queryset.annotate(rank=Value(0.0, FloatField())).none()
+    return filter_search(queryset, query).annotate(rank=search_rank(query))
@@ -0,0 +1,109 @@
+from django.db.models.signals import (
+    post_delete, post_init, post_migrate, post_save, pre_delete
+)
+from django.dispatch import receiver
+
+from .counters import invalidate_follow_count, invalidate_post_counts
+from .generations import (
+    bump_generations, generation_key, post_feed_generations
+)
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+from .search import install_search_triggers
+from .thumbnails import release_image
+from .timeline import backfill_timeline, fan_out_post, prune_timeline
+
+
+def get_image_name(post):
+    # Через __dict__, чтобы не загружать отложенное поле image
+    image = post.__dict__.get('image')
+    return getattr(image, 'name', image)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_group(sender, instance, **kwargs):
+    instance._initial_group_id = instance.group_id
+    instance._initial_image = get_image_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    bump_generations(
+        post_feed_generations(instance)
+        + [generation_key('post_card', instance.pk)])
+    if created:
+        AuthorStats.change(instance.author_id, 'posts_count', 1)
+        fan_out_post(instance)
+    if created or instance.group_id != instance._initial_group_id:
+        invalidate_post_counts(
+            instance.author_id,
+            (instance.group_id, instance._initial_group_id))
+    if instance._initial_image != get_image_name(instance):
+        release_image(instance._initial_image)
+    instance._initial_group_id = instance.group_id
+    instance._initial_image = get_image_name(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    release_image(get_image_name(instance))
+    bump_generations(post_feed_generations(instance))
+    AuthorStats.change(instance.author_id, 'posts_count', -1)
+    invalidate_post_counts(
+        instance.author_id,
+        (instance.group_id, instance._initial_group_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.change(instance.author_id, 'followers_count', 1)
+        AuthorStats.change(instance.user_id, 'following_count', 1)
+        backfill_timeline(instance.user_id, instance.author_id)
+    invalidate_follow_count(instance.user_id)
+    bump_generations([generation_key('follows', instance.user_id)])
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    AuthorStats.change(instance.author_id, 'followers_count', -1)
+    AuthorStats.change(instance.user_id, 'following_count', -1)
+    prune_timeline(instance.user_id, instance.author_id)
+    invalidate_follow_count(instance.user_id)
+    bump_generations([generation_key('follows', instance.user_id)])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    author_ids = Post.objects.filter(group_id=instance.pk).values_list(
+        'author_id', flat=True).distinct()
+    bump_generations(
+        [generation_key('index'), generation_key('group', instance.pk),
+         generation_key('group_card', instance.pk)]
+        + [generation_key('profile', author_id) for author_id in author_ids])
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Вход пользователя обновляет только last_login и не меняет карточки
+    if created or update_fields == frozenset(['last_login']):
+        return
+    group_ids = Post.objects.filter(
+        author_id=instance.pk, group__isnull=False).values_list(
+        'group_id', flat=True).distinct()
+    bump_generations(
+        [generation_key('index'), generation_key('profile', instance.pk),
+         generation_key('author_card', instance.pk)]
+        + [generation_key('group', group_id) for group_id in group_ids])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    bump_generations([generation_key('post', instance.post_id)])
+
+
+@receiver(post_migrate)
+def search_triggers_migrated(sender, using, **kwargs):
+    if sender.name == 'posts':
+        install_search_triggers(using)
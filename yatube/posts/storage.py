@@ -0,0 +1,69 @@
+import hashlib
+import logging
+import os
+from contextlib import contextmanager
+
+from django.core.files import locks
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — SHA-256 его содержимого.
+
+    Одинаковые картинки сохраняются один раз в <upload_to>/<xx>/<hash>.<ext>
+    и делят одни миниатюры sorl. Файл удаляется, когда на него не
+    ссылается ни один пост (см. release_image).
+    """
+
+    @contextmanager
+    def lock(self):
+        """Межпроцессная блокировка записи и удаления файлов хранилища."""
+        os.makedirs(self.location, exist_ok=True)
+        with open(os.path.join(self.location, '.lock'), 'wb') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def get_available_name(self, name, max_length=None):
+        # Имя все равно заменяется хэшем в _save
+        return name
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        key = digest.hexdigest()
+        return os.path.join(directory, key[:2], f'{key}{extension}')
+
+    def write_missing(self, name, content):
+        with self.lock():
+            if not self.exists(name):
+                content.seek(0)
+                super()._save(name, content)
+
+    def restore(self, name, content):
+        try:
+            self.write_missing(name, content)
+        except (OSError, ValueError):
+            logger.warning('Не удалось восстановить картинку %s', name,
+                           exc_info=True)
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        self.write_missing(name, content)
+        # До фиксации поста файл без ссылок может удалить
+        # delete_unused_image из другого запроса: после фиксации
+        # недостающий файл записывается снова
+        transaction.on_commit(lambda: self.restore(name, content))
+        return name
@@ -0,0 +1,26 @@
+from django import template
+
+from ..thumbnails import picture_context
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Карточка поста из кэша PostCards, переданного во view."""
+    return context['post_cards'].get(post)
+
+
+@register.inclusion_tag('includes/post_picture.html', takes_context=True)
+def post_picture(context, post):
+    """<picture> со srcset из готовых вариантов картинки поста.
+
+    Использует миниатюры, заранее загруженные preload_thumbnails в
+    context['thumbnails'], если они есть.
+    """
+    if not post.image:
+        return {'post': post}
+    return {
+        'post': post,
+        **picture_context(post.image, context.get('thumbnails')),
+    }
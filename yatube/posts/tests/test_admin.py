@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_posts(self, number):
+        start = Post.objects.count()
+        for index in range(start, start + number):
+            author = User.objects.create_user(username=f'author{index}')
+            group = Group.objects.create(
+                title=f'Группа {index}', slug=f'group-{index}',
+                description='Описание')
+            Post.objects.create(text='Текст', author=author, group=group)
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка постов в админке не зависит от числа
+        постов, авторов и групп
+        """
+        self.create_posts(2)
+        queries = self.changelist_queries()
+        self.create_posts(8)
+        self.assertEqual(self.changelist_queries(), queries)
+
+    def test_changelist_edits_group(self):
+        """Группа поста выводится и меняется из списка постов"""
+        self.create_posts(2)
+        post, other = Post.objects.order_by('pk')
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url)
+        self.assertContains(
+            response,
+            f'<option value="{post.group_id}" selected>{post.group}</option>',
+            html=True)
+        response = self.client.post(url, {
+            'form-TOTAL_FORMS': 2,
+            'form-INITIAL_FORMS': 2,
+            'form-0-id': other.pk,
+            'form-0-group': post.group_id,
+            'form-1-id': post.pk,
+            'form-1-group': post.group_id,
+            '_save': 'Сохранить',
+        })
+        self.assertEqual(response.status_code, 302)
+        other.refresh_from_db()
+        self.assertEqual(other.group_id, post.group_id)
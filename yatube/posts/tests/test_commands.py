@@ -0,0 +1,168 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+
+from ..bulk import keep_dates
+from ..models import (
+    AuthorStats, Comment, Follow, Group, Post, TimelineEntry, User
+)
+from ..timeline import timeline_posts
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class ExportImportCommandTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author, group=cls.group)
+        cls.pub_date = datetime(2020, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+        Post.objects.filter(pk=cls.post.pk).update(pub_date=cls.pub_date)
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def export(self):
+        output = StringIO()
+        call_command('export_posts', chunk_size=1, stdout=output,
+                     stderr=StringIO())
+        return output.getvalue()
+
+    def test_export_writes_ndjson(self):
+        """Выгрузка — по одной записи JSON на строку, группы первыми"""
+        records = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual(
+            [record['model'] for record in records],
+            ['group', 'post', 'comment', 'follow'])
+        self.assertEqual(records[1]['author'], 'author')
+        self.assertEqual(records[1]['group'], self.group.pk)
+
+    def test_import_restores_export(self):
+        """Загрузка восстанавливает выгрузку, даты и производные данные"""
+        data = self.export()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+            file.write(data)
+            file.flush()
+            call_command('import_posts', file.name, batch_size=1,
+                         stdout=StringIO())
+        post = Post.objects.select_related(
+            'author__stats', 'group').get(pk=self.post.pk)
+        self.assertEqual(post.pub_date, self.pub_date)
+        self.assertEqual(post.group.slug, self.group.slug)
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertEqual(post.author.stats.followers_count, 1)
+        self.assertTrue(post.comments.filter(
+            author__username='reader').exists())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user__username='reader', post=post).exists())
+        self.assertFalse(post.author.has_usable_password())
+        self.assertEqual(self.export(), data)
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_import_skips_fan_out_for_popular_authors(self):
+        """Подписчики считаются до раскладки: посты популярного автора
+        не раскладываются, лента собирается при чтении"""
+        data = self.export()
+        Group.objects.all().delete()
+        User.objects.all().delete()
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+            file.write(data)
+            file.flush()
+            call_command('import_posts', file.name, stdout=StringIO())
+        reader = User.objects.get(username='reader')
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertTrue(AuthorStats.objects.get(
+            user__username='author').fan_in)
+        self.assertEqual(
+            list(timeline_posts(reader).values_list('pk', flat=True)),
+            [self.post.pk])
+
+    def test_keep_dates_restores_auto_now_add(self):
+        """keep_dates возвращает прежнее значение auto_now_add"""
+        field = Post._meta.get_field('pub_date')
+        field.auto_now_add = False
+        try:
+            with keep_dates():
+                pass
+            self.assertFalse(field.auto_now_add)
+        finally:
+            field.auto_now_add = True
+        with self.assertRaises(ValueError):
+            with keep_dates():
+                raise ValueError
+        self.assertTrue(field.auto_now_add)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDataCommandTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_generate_data(self):
+        """Генератор создает заданные объемы данных и производные данные"""
+        call_command(
+            'generate_data', users=30, groups=3, posts=200, comments=100,
+            follows=5, images=2, seed=1, batch_size=50, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        self.assertEqual(
+            AuthorStats.objects.aggregate(total=Sum('posts_count'))['total'],
+            200)
+        # Популярность авторов неравномерная
+        top = Post.objects.values('author').annotate(
+            total=Count('pk')).order_by('-total').first()['total']
+        self.assertGreater(top, 200 / 30 * 2)
+
+
+class BenchmarkViewsCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_data', users=10, groups=2, posts=30, comments=10,
+            follows=3, images=0, seed=1, stdout=StringIO())
+
+    def benchmark(self, baseline, **options):
+        output = StringIO()
+        call_command('benchmark_views', iterations=2, baseline=baseline,
+                     stdout=output, **options)
+        return output.getvalue()
+
+    def test_benchmark_compares_with_baseline(self):
+        """Замер сохраняет baseline и падает при росте числа запросов"""
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            output = self.benchmark(baseline, save_baseline=True)
+            for view in ('index', 'follow_index', 'add_comment'):
+                self.assertIn(view, output)
+            with open(baseline) as file:
+                results = json.load(file)
+            self.assertIn('Регрессий нет', self.benchmark(
+                baseline, tolerance=100, min_delta_ms=1000))
+            results['post_detail']['queries'] = 0
+            with open(baseline, 'w') as file:
+                json.dump(results, file)
+            with self.assertRaisesMessage(CommandError, 'post_detail'):
+                self.benchmark(baseline, tolerance=100, min_delta_ms=1000)
@@ -0,0 +1,162 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def urls(self):
+        return (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+
+    def revalidate(self, client, url):
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_not_modified(self):
+        """Неизмененная страница отдает 304 без рендера шаблонов."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertFalse(response.templates)
+                self.assertLessEqual(len(queries), 1)
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag лент и страницы поста автора."""
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.urls()}
+        Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group)
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_comment_changes_post_etag(self):
+        """Комментарий меняет ETag страницы поста."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий')
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_changes_profile_etag(self):
+        """Подписка меняет кнопку и ETag профиля для подписчика."""
+        url = reverse('posts:profile', args=[self.author.username])
+        etag = self.reader_client.get(url)['ETag']
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_etag_depends_on_viewer(self):
+        """ETag гостя не подходит вошедшему пользователю."""
+        url = reverse('posts:index')
+        etag = self.guest_client.get(url)['ETag']
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_missing_object_not_found(self):
+        """Для несуществующего объекта ETag не считается, ответ 404."""
+        response = self.guest_client.get(
+            reverse('posts:group_list', args=['missing']),
+            HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторная анонимная страница берется из кэша без SQL."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url)
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(response.templates)
+        self.assertContains(response, self.post.text)
+
+    def test_cache_headers(self):
+        """Анонимный ответ публичный и зависит от cookie, ответ
+        вошедшему — приватный."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        response = self.guest_client.get(url)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+        response = self.author_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertContains(response, 'Добавить комментарий')
+
+    def test_anonymous_read_skips_session(self):
+        """Анонимное чтение не обращается к сессии."""
+        for url in (reverse('posts:index'),
+                    reverse('posts:post_detail', args=[self.post.pk])):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertFalse(response.wsgi_request.session.accessed)
+                self.assertNotIn('sessionid', response.cookies)
+
+    def test_writes_purge_cached_pages(self):
+        """Новый пост и комментарий меняют закэшированные страницы."""
+        index = reverse('posts:index')
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.guest_client.get(index)
+        self.guest_client.get(detail)
+        Post.objects.create(text='Новый пост', author=self.author)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый комментарий')
+        self.assertContains(self.guest_client.get(index), 'Новый пост')
+        self.assertContains(
+            self.guest_client.get(detail), 'Новый комментарий')
+
+    def test_query_string_in_key(self):
+        """Страницы ленты с разными параметрами кэшируются отдельно."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        response = self.guest_client.get(url, {'page': 2})
+        self.assertTrue(response.templates)
@@ -0,0 +1,71 @@
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.core.cache import cache
+
+from ..counters import feed_count_key
+from ..models import Post, Group, User, Follow
+
+
+class FeedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Stepan')
+        cls.follower = User.objects.create_user(username='Sergei')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.follower)
+
+    def feeds(self):
+        return (
+            (self.guest_client, reverse('posts:index'),
+             feed_count_key('all')),
+            (self.guest_client,
+             reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+             feed_count_key('group', self.group.pk)),
+            (self.guest_client,
+             reverse('posts:profile', kwargs={'username': self.user}),
+             feed_count_key('author', self.user.pk)),
+            (self.authorized_client, reverse('posts:follow_index'),
+             feed_count_key('follow', self.follower.pk)),
+        )
+
+    def test_feed_count_is_cached(self):
+        """Число постов ленты берется из кэша после первого запроса"""
+        for client, address, key in self.feeds():
+            with self.subTest(address=address):
+                count = client.get(
+                    address).context['page_obj'].paginator.count
+                self.assertEqual(count, 1)
+                self.assertEqual(cache.get(key), 1)
+
+    def test_feed_count_invalidated_on_post_create_and_delete(self):
+        """Создание и удаление поста сбрасывает счетчики его лент"""
+        for client, address, key in self.feeds():
+            client.get(address).context['page_obj'].paginator.count
+        post = Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group)
+        for client, address, key in self.feeds():
+            with self.subTest(address=address):
+                self.assertIsNone(cache.get(key))
+                count = client.get(
+                    address).context['page_obj'].paginator.count
+                self.assertEqual(count, 2)
+        post.delete()
+        for client, address, key in self.feeds():
+            with self.subTest(address=address):
+                self.assertIsNone(cache.get(key))
@@ -1,11 +1,18 @@
+import hashlib
+import os
 import shutil
 import tempfile
+from io import BytesIO
+from unittest import mock
 
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
 
+from ..forms import PostForm
+from ..thumbnails import delete_unused_image
 from ..models import Post, User, Group, Comment
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -35,6 +42,8 @@ class PostFormTests(TestCase):
             content_type='image/gif'
         )
         cls.ID_COEF = 1  # Идентификатор для нахождения поста и комментария
+        digest = hashlib.sha256(cls.SMALL_GIF).hexdigest()
+        cls.IMAGE_NAME = f'posts/{digest[:2]}/{digest}.gif'
         cls.user = User.objects.create_user(username='Stepan')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -81,7 +90,7 @@ class PostFormTests(TestCase):
             (some_post.text, form_data['text']),
             (some_post.author, self.user),
             (some_post.group.id, form_data['group']),
-            (some_post.image, f'posts/{self.uploaded.name}'),
+            (some_post.image, self.IMAGE_NAME),
         ]
         for reverse_name, response_name in post_objects:
             with self.subTest(reverse_name=reverse_name):
@@ -116,7 +125,7 @@ class PostFormTests(TestCase):
             (edit_post.text, form_data['text']),
             (edit_post.author, self.user),
             (edit_post.group.id, form_data['group']),
-            (edit_post.image, f'posts/{self.uploaded_new.name}')
+            (edit_post.image, self.IMAGE_NAME)
         ]
         for reverse_name, response_name in post_edit_objects:
             with self.subTest(reverse_name=reverse_name):
@@ -154,3 +163,103 @@ class PostFormTests(TestCase):
             with self.subTest(reverse_name=reverse_name):
                 self.assertEqual(response_name, reverse_name)
             self.assertRedirects(response, redirect_page)
+
+    def make_png(self, size):
+        buffer = BytesIO()
+        Image.new('RGB', size).save(buffer, 'PNG')
+        return SimpleUploadedFile('big.png', buffer.getvalue(),
+                                  content_type='image/png')
+
+    @override_settings(POST_IMAGE_MAX_RESOLUTION=(100, 100))
+    def test_big_image_downsized_before_saving(self):
+        """Картинка больше POST_IMAGE_MAX_RESOLUTION уменьшается"""
+        form = PostForm(data={'text': 'Текст'},
+                        files={'image': self.make_png((400, 200))})
+        self.assertTrue(form.is_valid())
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual(image.size, (100, 50))
+
+    @override_settings(POST_IMAGE_MAX_RESOLUTION=(100, 100))
+    def test_big_mpo_image_saved_as_jpeg(self):
+        """Уменьшенная картинка MPO сохраняется как JPEG"""
+        frame = Image.new('RGB', (400, 200))
+        buffer = BytesIO()
+        frame.save(buffer, 'MPO', save_all=True, append_images=[frame])
+        upload = SimpleUploadedFile('photo.mpo', buffer.getvalue(),
+                                    content_type='image/jpeg')
+        # Pillow до 9.3 не умеет сохранять MPO
+        with mock.patch.dict(Image.SAVE):
+            del Image.SAVE['MPO']
+            form = PostForm(data={'text': 'Текст'}, files={'image': upload})
+            self.assertTrue(form.is_valid())
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (100, 50))
+
+    def test_image_over_limits_rejected(self):
+        """Картинки больше лимитов размера и разрешения отклоняются"""
+        limits = (
+            {'POST_IMAGE_MAX_PIXELS': 100},
+            {'POST_IMAGE_MAX_UPLOAD_SIZE': 10},
+        )
+        for limit in limits:
+            with self.subTest(limit=limit), override_settings(**limit):
+                form = PostForm(data={'text': 'Текст'},
+                                files={'image': self.make_png((20, 20))})
+                self.assertFalse(form.is_valid())
+                self.assertIn('image', form.errors)
+
+    @override_settings(POST_IMAGE_MAX_DECODED_PIXELS=100)
+    def test_decoded_pixels_limit_only_for_non_jpeg(self):
+        """Разрешение не-JPEG картинок ограничено сильнее: их нельзя
+        уменьшить при декодировании"""
+        buffer = BytesIO()
+        Image.new('RGB', (20, 20)).save(buffer, 'JPEG')
+        jpeg = SimpleUploadedFile('photo.jpg', buffer.getvalue(),
+                                  content_type='image/jpeg')
+        uploads = ((self.make_png((20, 20)), False), (jpeg, True))
+        for upload, valid in uploads:
+            with self.subTest(name=upload.name):
+                form = PostForm(data={'text': 'Текст'},
+                                files={'image': upload})
+                self.assertEqual(form.is_valid(), valid)
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_big_upload_rejected_by_post_create(self):
+        """Загрузка больше лимита отклоняется формой поста"""
+        posts_count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Текст', 'image': self.make_png((100, 100))})
+        self.assertIn('image', response.context['form'].errors)
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    def test_post_create_checks_csrf(self):
+        """limit_uploads сохраняет проверку CSRF"""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        posts_count = Post.objects.count()
+        response = client.post(reverse('posts:post_create'),
+                               data={'text': 'Текст'})
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    def test_same_image_stored_once(self):
+        """Одинаковые картинки хранятся в одном файле, который удаляется
+        вместе с последним ссылающимся на него постом"""
+        posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=self.user,
+                image=SimpleUploadedFile(f'copy_{number}.gif', self.SMALL_GIF,
+                                         content_type='image/gif'))
+            for number in range(2)
+        ]
+        self.assertEqual(posts[0].image.name, self.IMAGE_NAME)
+        self.assertEqual(posts[1].image.name, self.IMAGE_NAME)
+        path = os.path.join(settings.MEDIA_ROOT, self.IMAGE_NAME)
+        posts[0].delete()
+        delete_unused_image(self.IMAGE_NAME)
+        self.assertTrue(os.path.exists(path))
+        posts[1].delete()
+        delete_unused_image(self.IMAGE_NAME)
+        self.assertFalse(os.path.exists(path))
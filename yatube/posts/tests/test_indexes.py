@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Group, Post, User
+
+
+class FeedIndexTests(TestCase):
+    """Запросы лент читают индекс, а не сортируют таблицу."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Stepan')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def feed_queries(self):
+        return (
+            ('index', Post.objects.all(), 'post_pub_date_idx'),
+            ('group', self.group.posts.all(), 'post_group_pub_date_idx'),
+            ('profile', self.user.posts.all(), 'post_author_pub_date_idx'),
+            ('cursor', Post.objects.order_by('-pub_date', '-pk'),
+             'post_pub_date_idx'),
+            ('comments', self.post.comments.order_by('created'),
+             'comment_post_created_idx'),
+        )
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset[:10].explain()
+
+    def test_feed_queries_use_index(self):
+        """Каждая лента использует свой индекс без сортировки"""
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN проверяется только на SQLite и PostgreSQL')
+        for feed, queryset, index in self.feed_queries():
+            plan = self.explain(queryset)
+            with self.subTest(feed=feed):
+                self.assertIn(index, plan)
+                if connection.vendor == 'sqlite':
+                    self.assertNotIn('TEMP B-TREE', plan)
+                else:
+                    self.assertNotIn('Sort', plan)
@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import AuthorStats, Follow, Group, Post, User
 
 
 class PostModelTest(TestCase):
@@ -57,3 +60,54 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     self.post._meta.get_field(field).help_text,
                     expected_value)
+
+
+class AuthorStatsModelTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.follower = User.objects.create_user(username='follower')
+
+    def assertStats(self, user, posts, followers, following):
+        stats = AuthorStats.objects.get(user=user)
+        self.assertEqual(
+            (stats.posts_count, stats.followers_count, stats.following_count),
+            (posts, followers, following))
+
+    def test_stats_follow_post_and_follow_writes(self):
+        """Счетчики меняются при создании и удалении постов и подписок."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        follow = Follow.objects.create(user=self.follower, author=self.author)
+        self.assertStats(self.author, 1, 1, 0)
+        self.assertStats(self.follower, 0, 0, 1)
+        post.delete()
+        follow.delete()
+        self.assertStats(self.author, 0, 0, 0)
+        self.assertStats(self.follower, 0, 0, 0)
+
+    def test_stats_do_not_go_below_zero(self):
+        """Удаление постов, созданных без сигналов, не ломает счетчик."""
+        Post.objects.create(author=self.author, text='Пост')
+        Post.objects.bulk_create(
+            [Post(author=self.author, text='Без сигналов')])
+        Post.objects.filter(author=self.author).delete()
+        self.assertStats(self.author, 0, 0, 0)
+
+    def test_rebuild_author_stats_command(self):
+        """Команда rebuild_author_stats восстанавливает счетчики."""
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}') for i in range(3))
+        Follow.objects.create(user=self.follower, author=self.author)
+        AuthorStats.objects.all().delete()
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertStats(self.author, 3, 1, 0)
+        self.assertStats(self.follower, 0, 0, 1)
+
+    def test_rebuild_author_stats_keeps_fan_in(self):
+        """rebuild_author_stats не сбрасывает отметку fan_in."""
+        Follow.objects.create(user=self.follower, author=self.author)
+        AuthorStats.objects.filter(user=self.author).update(fan_in=True)
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertTrue(AuthorStats.objects.get(user=self.author).fan_in)
+        self.assertFalse(AuthorStats.objects.get(user=self.follower).fan_in)
@@ -1,3 +1,4 @@
+import base64
 from math import ceil
 
 from django.test import TestCase, Client
@@ -60,3 +61,54 @@ class PaginatorViewsTest(TestCase):
                     len(response_last_page.context['page_obj']),
                     self.TEST_POSTS - (self.NUMBER_OF_PAGES - self.PAGE_COEF)
                     * settings.POSTS_IN_PAGE)
+
+    def test_cursor_paginator_walks_all_posts(self):
+        """Переход по ?cursor= вперед и назад проходит все посты
+        index, group_list, profile без пропусков и повторов.
+        """
+        pages_address = (
+            reverse('posts:index'),
+            reverse('posts:group_list',
+                    kwargs={'slug': f'{self.group.slug}'}),
+            reverse('posts:profile',
+                    kwargs={'username': f'{self.user.username}'}),
+        )
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True))
+        for address in pages_address:
+            seen = []
+            pages = []
+            cursor = ''
+            while cursor is not None:
+                page_obj = self.guest_client.get(
+                    address, {'cursor': cursor}).context['page_obj']
+                pages.append([post.pk for post in page_obj])
+                seen.extend(pages[-1])
+                cursor = page_obj.next_cursor
+            with self.subTest(address=address):
+                self.assertEqual(seen, expected)
+                self.assertEqual(len(pages), self.NUMBER_OF_PAGES)
+            previous_cursor = page_obj.previous_cursor
+            page_obj = self.guest_client.get(
+                address, {'cursor': previous_cursor}).context['page_obj']
+            with self.subTest(address=address):
+                self.assertEqual([post.pk for post in page_obj], pages[-2])
+
+    def test_cursor_without_posts_gives_first_page(self):
+        """Курсор, за которым постов нет, открывает первую страницу."""
+        first_page = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True)[:settings.POSTS_IN_PAGE])
+        cursors = (
+            'n|1970-01-01T00:00:00+00:00|1',
+            'p|2999-01-01T00:00:00+00:00|1',
+        )
+        for raw in cursors:
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            with self.subTest(cursor=raw):
+                response = self.guest_client.get(
+                    reverse('posts:index'), {'cursor': cursor})
+                page_obj = response.context['page_obj']
+                self.assertEqual([post.pk for post in page_obj], first_page)
+                self.assertIsNone(page_obj.previous_cursor)
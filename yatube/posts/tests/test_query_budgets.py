@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.query_budget import format_queries, query_budget
+from ..models import Comment, Follow, Group, Post, User
+from ..query_budgets import QUERY_BUDGETS
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug',
+            description='Тестовое описание')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = cls.create_post()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def create_post(cls):
+        return Post.objects.create(
+            text='Тестовый текст', author=cls.author, group=cls.group,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF,
+                                     content_type='image/gif'))
+
+    def fill_pages(self):
+        """Полные страницы лент и списков подписок, много комментариев."""
+        for number in range(settings.POSTS_IN_PAGE * 2):
+            self.create_post()
+            user = User.objects.create_user(username=f'user{number}')
+            Follow.objects.create(user=user, author=self.author)
+            Follow.objects.create(user=self.reader, author=user)
+            Comment.objects.create(post=self.post, author=user, text='Текст')
+
+    def requests(self):
+        author = self.author.username
+        return {
+            'posts:index': ('get', reverse('posts:index'), None),
+            'posts:group_list': ('get', reverse(
+                'posts:group_list', args=[self.group.slug]), None),
+            'posts:profile': ('get', reverse(
+                'posts:profile', args=[author]), self.reader),
+            'posts:post_detail': ('get', reverse(
+                'posts:post_detail', args=[self.post.pk]), None),
+            'posts:search': ('get', reverse('posts:search') + '?q=текст',
+                             None),
+            'posts:follow_index': ('get', reverse('posts:follow_index'),
+                                   self.reader),
+            'posts:my_follow': ('get', reverse('posts:my_follow'),
+                                self.reader),
+            'posts:my_follower': ('get', reverse('posts:my_follower'),
+                                  self.author),
+            'posts:post_create': ('get', reverse('posts:post_create'),
+                                  self.reader),
+            'posts:add_comment': ('post', reverse(
+                'posts:add_comment', args=[self.post.pk]), self.reader),
+        }
+
+    def check_budgets(self):
+        for name, (method, url, user) in self.requests().items():
+            with self.subTest(view=name):
+                client = Client()
+                if user is not None:
+                    client.force_login(user)
+                cache.clear()
+                with query_budget(QUERY_BUDGETS[name]):
+                    response = getattr(client, method)(
+                        url, {'text': 'Комментарий'} if method == 'post'
+                        else None)
+                self.assertLess(response.status_code, 400)
+
+    def test_every_budget_is_checked(self):
+        """У каждого представления из реестра бюджетов есть проверка"""
+        self.assertEqual(set(self.requests()), set(QUERY_BUDGETS))
+
+    def test_views_fit_query_budgets(self):
+        """Число запросов представлений не растет с числом объектов"""
+        self.check_budgets()
+        self.fill_pages()
+        self.check_budgets()
+
+    def test_budget_error_lists_repeated_queries(self):
+        """Сообщение о превышении бюджета показывает повторы запросов"""
+        with self.assertRaises(AssertionError) as error:
+            with query_budget(1):
+                for user in User.objects.all():
+                    list(user.posts.all())
+        self.assertIn('бюджет 1', str(error.exception))
+        self.assertIn('повторяется 2 раз', str(error.exception))
+
+    def test_format_queries_numbers_queries(self):
+        message = format_queries(
+            [{'sql': 'SELECT 1'}, {'sql': 'SELECT 2'}], 1)
+        self.assertIn('1. SELECT 1', message)
+        self.assertIn('2. SELECT 2  [повторяется 2 раз]', message)
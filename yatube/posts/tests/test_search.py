@@ -0,0 +1,92 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import search_posts
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Stepan')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.TEST_POSTS = settings.POSTS_IN_PAGE + 3
+        Post.objects.bulk_create(
+            Post(text=f'Пост про котов № {number}', author=cls.user)
+            for number in range(cls.TEST_POSTS)
+        )
+        cls.other = Post.objects.create(
+            text='Пост про собак', author=cls.user)
+
+    def search(self, **params):
+        return self.client.get(reverse('posts:search'), params)
+
+    def test_search_finds_matching_posts(self):
+        """Поиск находит посты со всеми словами запроса"""
+        response = self.search(q='собак пост')
+        self.assertEqual(list(response.context['page_obj']), [self.other])
+        response = self.search(q='ПОСТ')
+        self.assertEqual(
+            len(response.context['page_obj']), settings.POSTS_IN_PAGE)
+
+    def test_search_index_follows_changes(self):
+        """Изменение и удаление поста видны в поиске"""
+        Post.objects.filter(pk=self.other.pk).update(text='Пост про ежей')
+        self.assertFalse(self.search(q='собак').context['page_obj'])
+        self.assertTrue(self.search(q='ежей').context['page_obj'])
+        Post.objects.filter(pk=self.other.pk).delete()
+        self.assertFalse(self.search(q='ежей').context['page_obj'])
+
+    def test_search_operators_are_plain_words(self):
+        """Операторы движка поиска в запросе считаются обычными словами"""
+        response = self.search(q='"котов OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_cursor_pages(self):
+        """Курсор проходит все результаты поиска без повторов"""
+        response = self.search(q='котов')
+        page_obj = response.context['page_obj']
+        found = list(page_obj)
+        self.assertContains(response, 'q=%D0%BA%D0%BE%D1%82%D0%BE%D0%B2&')
+        while page_obj.has_next():
+            page_obj = self.search(
+                q='котов', cursor=page_obj.next_cursor).context['page_obj']
+            found += list(page_obj)
+        self.assertEqual(len(found), self.TEST_POSTS)
+        self.assertEqual(len(set(found)), self.TEST_POSTS)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке находит посты по словам"""
+        self.client.force_login(self.admin)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'собак'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.other])
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'Колонка search_vector есть только в PostgreSQL')
+class PostgreSQLSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        user = User.objects.create_user(username='Stepan')
+        cls.cats = Post.objects.create(
+            text='Коты спят на солнце', author=user)
+        Post.objects.create(text='Собаки лают', author=user)
+
+    def test_search_uses_search_vector(self):
+        """Поиск идет по search_vector с учетом словоформ, ранг — float8"""
+        posts = search_posts(Post.objects.all(), 'кот')
+        sql = str(posts.query)
+        self.assertIn('search_vector @@ plainto_tsquery', sql)
+        self.assertIn('ts_rank', sql)
+        self.assertEqual(list(posts), [self.cats])
+        self.assertIsInstance(posts[0].rank, float)
+        self.assertGreater(posts[0].rank, 0)
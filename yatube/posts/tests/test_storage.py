@@ -0,0 +1,46 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from ..models import Post, User
+from ..thumbnails import delete_unused_image, image_storage
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = b'GIF89a\x01\x00\x01\x00\x00\x00\x00;'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_file_deleted_before_commit_restored(self):
+        """Файл, удаленный конкурентным delete_unused_image до фиксации
+        поста, записывается снова после фиксации"""
+        storage = image_storage()
+        author = User.objects.create_user(username='Stepan')
+        with transaction.atomic():
+            post = Post.objects.create(
+                text='Пост', author=author,
+                image=ContentFile(CONTENT, name='copy.gif'))
+            # Удаление из другого запроса еще не видит этот пост
+            storage.delete(post.image.name)
+        self.assertTrue(storage.exists(post.image.name))
+
+    def test_unused_image_deleted_after_commit(self):
+        """Картинка без ссылок удаляется после удаления поста"""
+        storage = image_storage()
+        author = User.objects.create_user(username='Stepan')
+        post = Post.objects.create(
+            text='Пост', author=author,
+            image=ContentFile(CONTENT, name='copy.gif'))
+        name = post.image.name
+        post.delete()
+        delete_unused_image(name)
+        self.assertFalse(storage.exists(name))
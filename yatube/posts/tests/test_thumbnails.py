@@ -0,0 +1,89 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from ..models import Post, User
+from ..thumbnails import (
+    all_image_variants, generate_thumbnail, image_variants,
+    preload_thumbnails, supported_formats
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class PregeneratedThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        buffer = BytesIO()
+        Image.new('RGB', (40, 20)).save(buffer, 'PNG')
+        cls.user = User.objects.create_user(username='Stepan')
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user,
+            image=SimpleUploadedFile('small.png', buffer.getvalue(),
+                                     content_type='image/png'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_request_path_does_not_generate_thumbnail(self):
+        """В запросе миниатюра не создается, выводится оригинал"""
+        self.assertIsNone(
+            default.backend.get_thumbnail(self.post.image, '1200x600',
+                                          upscale=True))
+        response = self.client.get(f'/posts/{self.post.pk}/')
+        self.assertContains(response, self.post.image.url)
+
+    def test_pregenerated_thumbnail_is_found(self):
+        """Миниатюра, созданная в фоне, находится при рендеринге"""
+        for geometry, options in image_variants():
+            generate_thumbnail(
+                (self.post.image.name, geometry,
+                 tuple(sorted(options.items()))))
+        geometry, options = list(image_variants())[-1]
+        thumbnail = default.backend.get_thumbnail(
+            self.post.image, geometry, **options)
+        self.assertIsNotNone(thumbnail)
+        self.assertEqual(thumbnail.width, settings.POST_IMAGE_WIDTHS[-1])
+
+    def test_picture_has_srcset_for_each_format(self):
+        """<picture> содержит srcset всех ширин для каждого формата"""
+        for image_format in [*supported_formats(), None]:
+            for geometry, options in image_variants(image_format):
+                generate_thumbnail(
+                    (self.post.image.name, geometry,
+                     tuple(sorted(options.items()))))
+        response = self.client.get(f'/posts/{self.post.pk}/')
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/webp"')
+        for width in settings.POST_IMAGE_WIDTHS:
+            with self.subTest(width=width):
+                self.assertContains(response, f' {width}w')
+
+    def test_preload_reads_all_variants_in_one_query(self):
+        """Варианты нескольких картинок читаются одним запросом к базе"""
+        for geometry, options in all_image_variants():
+            generate_thumbnail(
+                (self.post.image.name, geometry,
+                 tuple(sorted(options.items()))))
+        cache.clear()
+        with self.assertNumQueries(1):
+            thumbnails = preload_thumbnails([self.post.image])
+        self.assertTrue(all(thumbnails.values()))
+        with self.assertNumQueries(0):
+            preload_thumbnails([self.post.image])
@@ -7,7 +7,7 @@ from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
-from ..models import Post, Group, User, Comment, Follow
+from ..models import Post, Group, User, Comment, Follow, TimelineEntry
 from ..forms import PostForm
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
@@ -156,16 +156,61 @@ class PostViewsTests(TestCase):
                 self.assertEqual(response_name, reverse_name)
 
     def test_cache_index_page(self):
-        """Проверка кэширования главное страницы"""
+        """Проверка кэширования главное страницы: фрагмент живет,
+        пока не изменятся данные, и сбрасывается при удалении поста"""
         address = reverse('posts:index')
         posts = self.guest_client.get(address).content
-        Post.objects.get(id=self.post.id).delete()
+        Post.objects.filter(id=self.post.id).update(text='Без сигналов')
         old_posts = self.guest_client.get(address).content
         self.assertEqual(posts, old_posts)
-        cache.clear()
+        Post.objects.get(id=self.post.id).delete()
         new_posts = self.guest_client.get(address).content
         self.assertNotEqual(new_posts, old_posts)
 
+    def test_feed_fragments_invalidated_on_changes(self):
+        """Фрагменты index, group_list, profile и комментариев
+        сбрасываются при изменении поста, группы и комментария"""
+        cache.clear()
+        feeds = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.post.author}),
+        )
+        for address in feeds:
+            self.guest_client.get(address)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название группы'
+        group.save()
+        for address in feeds:
+            with self.subTest(address=address):
+                self.assertContains(
+                    self.guest_client.get(address), group.title)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Отредактированный текст'
+        post.save()
+        for address in feeds:
+            with self.subTest(address=address):
+                self.assertContains(
+                    self.guest_client.get(address), post.text)
+        address = reverse('posts:post_detail',
+                          kwargs={'post_id': self.post.id})
+        self.guest_client.get(address)
+        Comment.objects.create(
+            author=self.user, text='Свежий комментарий', post=self.post)
+        self.assertContains(
+            self.guest_client.get(address), 'Свежий комментарий')
+
+    @override_settings(FRAGMENT_CACHE_TIMEOUT=0, PAGE_CACHE_TIMEOUT=0)
+    def test_fragments_use_fragment_cache_timeout(self):
+        """Фрагменты кэшируются на FRAGMENT_CACHE_TIMEOUT, а не навсегда"""
+        comment = Comment.objects.create(
+            author=self.user, text='Старый комментарий', post=self.post)
+        address = reverse('posts:post_detail',
+                          kwargs={'post_id': self.post.id})
+        self.guest_client.get(address)
+        Comment.objects.filter(pk=comment.pk).update(text='Без сигналов')
+        self.assertContains(self.guest_client.get(address), 'Без сигналов')
+
     def test_authorized_user_follow_correctly(self):
         """Проверка подписки авторизованного пользователя """
         all_follow = Follow.objects.count()
@@ -197,3 +242,72 @@ class PostViewsTests(TestCase):
         self.authorized_client.force_login(self.user)
         response = self.authorized_client.get(address).context['page_obj']
         self.assertNotIn(self.post, response)
+
+    def test_timeline_backfilled_on_follow_and_pruned_on_unfollow(self):
+        """Подписка добавляет посты автора в ленту, отписка удаляет их"""
+        self.authorized_client.force_login(self.authorized_user)
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': self.user}))
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.authorized_user).exists())
+        self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': self.user}))
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.authorized_user, post=self.post).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_popular_author_posts_read_without_fan_out(self):
+        """Посты популярного автора не раскладываются по лентам,
+        но попадают в ленту подписок при чтении"""
+        post = Post.objects.create(text='Популярный пост', author=self.user)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.authorized_client.force_login(self.authorized_user)
+        response = self.authorized_client.get(
+            reverse('posts:follow_index')).context['page_obj']
+        self.assertIn(post, response)
+        self.assertIn(self.post, response)
+
+    def test_skipped_fan_out_read_after_author_drops_under_limit(self):
+        """Посты и подписки, пропущенные у популярного автора, остаются
+        в лентах, когда подписчиков снова меньше лимита"""
+        with override_settings(TIMELINE_FANOUT_LIMIT=0):
+            post = Post.objects.create(
+                text='Популярный пост', author=self.user)
+            reader = User.objects.create_user(username='Reader')
+            Follow.objects.create(user=reader, author=self.user)
+        for user in (self.authorized_user, reader):
+            with self.subTest(user=user):
+                self.authorized_client.force_login(user)
+                response = self.authorized_client.get(
+                    reverse('posts:follow_index')).context['page_obj']
+                self.assertIn(post, response)
+                self.assertIn(self.post, response)
+
+    def test_post_card_cached_and_invalidated_on_author_rename(self):
+        """Карточка поста берется из кэша во всех лентах и
+        сбрасывается при изменении имени автора"""
+        cache.clear()
+        address = reverse('posts:index')
+        self.guest_client.get(address)
+        Post.objects.filter(id=self.post.id).update(text='Без сигналов')
+        profile = reverse('posts:profile',
+                          kwargs={'username': self.post.author})
+        self.assertNotContains(self.guest_client.get(profile), 'Без сигналов')
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Степан'
+        user.save()
+        for address in (address, profile):
+            with self.subTest(address=address):
+                response = self.guest_client.get(address)
+                self.assertContains(response, 'Без сигналов')
+                self.assertContains(response, 'Степан')
+
+    @override_settings(FRAGMENT_CACHE_TIMEOUT=0, PAGE_CACHE_TIMEOUT=0)
+    def test_post_card_uses_fragment_cache_timeout(self):
+        """Карточки кэшируются на FRAGMENT_CACHE_TIMEOUT, а не навсегда"""
+        cache.clear()
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.filter(id=self.post.id).update(text='Без сигналов')
+        profile = reverse('posts:profile',
+                          kwargs={'username': self.post.author})
+        self.assertContains(self.guest_client.get(profile), 'Без сигналов')
@@ -0,0 +1,250 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.db import connection, transaction
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.base import EXTENSIONS, ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import serialize, tokey
+from sorl.thumbnail.images import ImageFile
+
+from .generations import bump_generations, post_card_generations
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+}
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+class PregeneratedThumbnailBackend(ThumbnailBackend):
+    """Backend sorl, который не создает миниатюры в запросе.
+
+    get_thumbnail только ищет готовую миниатюру в key-value store, а при
+    промахе ставит ее создание в фоновый пул и возвращает None: шаблонный
+    тег {% thumbnail %} тогда выводит блок {% empty %}.
+    """
+
+    def get_options(self, source, options):
+        # Те же опции, что и в ThumbnailBackend.get_thumbnail, чтобы имя
+        # миниатюры совпадало с созданной в фоне.
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail_file(self, file_, geometry_string, options):
+        """ImageFile миниатюры без обращения к key-value store."""
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.get_options(source, dict(options)))
+        return ImageFile(name, default.storage)
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        thumbnail = self.get_thumbnail_file(file_, geometry_string, options)
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            return cached
+        schedule_thumbnail(file_.name, geometry_string, options)
+        return None
+
+    def generate(self, file_, geometry_string, **options):
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        # В EXTENSIONS sorl нет AVIF
+        key = tokey(source.key, geometry_string, serialize(options))
+        path = f'{key[:2]}/{key[2:4]}/{key}'
+        extension = EXTENSIONS.get(options['format'],
+                                   options['format'].lower())
+        return f'{thumbnail_settings.THUMBNAIL_PREFIX}{path}.{extension}'
+
+
+def supported_formats():
+    """Форматы из POST_IMAGE_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [
+        image_format for image_format in settings.POST_IMAGE_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def image_variants(image_format=None):
+    """(geometry, options) всех ширин POST_IMAGE_WIDTHS в формате
+    image_format; None — формат оригинала.
+    """
+    for width in settings.POST_IMAGE_WIDTHS:
+        options = {'upscale': True}
+        if image_format is not None:
+            options['format'] = image_format
+        yield f'{width}x{width // 2}', options
+
+
+def get_srcset(thumbnails):
+    return ', '.join(
+        f'{thumbnail.url} {thumbnail.width}w' for thumbnail in thumbnails)
+
+
+def all_image_variants():
+    for image_format in [*supported_formats(), None]:
+        yield from image_variants(image_format)
+
+
+def variant_key(image, geometry_string, options):
+    return image.name, geometry_string, tuple(sorted(options.items()))
+
+
+def preload_thumbnails(images):
+    """Готовые миниатюры всех вариантов картинок одним get_many.
+
+    Возвращает {(имя картинки, геометрия, опции): ImageFile или None};
+    отсутствующие варианты ставятся в очередь на создание.
+    """
+    files = {}
+    for image in images:
+        for geometry_string, options in all_image_variants():
+            files[variant_key(image, geometry_string, options)] = (
+                default.backend.get_thumbnail_file(
+                    image, geometry_string, options))
+    found = default.kvstore.get_many(files.values())
+    thumbnails = {}
+    for key, thumbnail_file in files.items():
+        thumbnails[key] = found.get(thumbnail_file.key)
+        if thumbnails[key] is None:
+            schedule_thumbnail(*key[:2], dict(key[2]))
+    return thumbnails
+
+
+def picture_context(image, thumbnails=None):
+    """Готовые варианты картинки для <picture>.
+
+    thumbnails — результат preload_thumbnails; без него варианты одной
+    картинки читаются отдельным get_many. Отсутствующие варианты не
+    попадают в srcset.
+    """
+    if thumbnails is None:
+        thumbnails = preload_thumbnails([image])
+
+    def ready(image_format=None):
+        return [
+            thumbnails[variant_key(image, geometry_string, options)]
+            for geometry_string, options in image_variants(image_format)
+            if thumbnails.get(variant_key(image, geometry_string, options))
+        ]
+
+    sources = [
+        {'type': IMAGE_MIME_TYPES[image_format],
+         'srcset': get_srcset(ready(image_format))}
+        for image_format in supported_formats() if ready(image_format)
+    ]
+    fallback = ready()
+    return {
+        'sources': sources,
+        'fallback': fallback[-1] if fallback else None,
+        'srcset': get_srcset(fallback),
+        'sizes': f'(max-width: {settings.POST_IMAGE_WIDTHS[-1]}px) 100vw, '
+                 f'{settings.POST_IMAGE_WIDTHS[-1]}px',
+    }
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def image_storage():
+    from .models import Post
+
+    return Post._meta.get_field('image').storage
+
+
+def generate_thumbnail(task):
+    name, geometry_string, options = task
+    try:
+        default.backend.generate(
+            ImageFile(name, image_storage()), geometry_string,
+            **dict(options))
+        bump_generations(post_card_generations(name))
+    except Exception:
+        logger.exception('Не удалось создать миниатюру %s', name)
+    finally:
+        with _lock:
+            _pending.discard(task)
+        if settings.THUMBNAIL_WORKERS:
+            connection.close()
+
+
+def submit_thumbnail(task):
+    with _lock:
+        if task in _pending:
+            return
+        if len(_pending) >= settings.THUMBNAIL_QUEUE_LIMIT:
+            logger.warning('Очередь миниатюр переполнена, %s пропущена',
+                           task[0])
+            return
+        _pending.add(task)
+    if settings.THUMBNAIL_WORKERS:
+        get_executor().submit(generate_thumbnail, task)
+    else:
+        generate_thumbnail(task)
+
+
+def schedule_thumbnail(name, geometry_string, options):
+    """Ставит создание миниатюры в пул после фиксации транзакции."""
+    task = (name, geometry_string, tuple(sorted(options.items())))
+    transaction.on_commit(lambda: submit_thumbnail(task))
+
+
+def schedule_post_thumbnails(post):
+    """Создает все ширины и форматы вариантов картинки поста."""
+    if not post.image:
+        return
+    for geometry_string, options in all_image_variants():
+        schedule_thumbnail(post.image.name, geometry_string, options)
+
+
+def delete_unused_image(name):
+    """Удаляет картинку и ее миниатюры, если на нее не ссылается ни один
+    пост: одинаковые загрузки делят один файл.
+
+    Проверка и удаление идут под блокировкой хранилища, с которой
+    ContentAddressedStorage восстанавливает файл после фиксации поста.
+    """
+    from .models import Post
+
+    storage = image_storage()
+    with storage.lock():
+        if Post.objects.filter(image=name).exists():
+            return
+        try:
+            default.backend.delete(ImageFile(name, storage))
+        except (OSError, SuspiciousFileOperation):
+            logger.warning('Не удалось удалить картинку %s', name,
+                           exc_info=True)
+
+
+def release_image(name):
+    if name:
+        transaction.on_commit(lambda: delete_unused_image(name))
@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+
+
+def is_fan_out_author(author_id):
+    """Посты автора раскладываются по лентам подписчиков при записи.
+
+    Для авторов с числом подписчиков больше TIMELINE_FANOUT_LIMIT лента
+    собирается при чтении. Пропущенные раскладки не восстанавливаются,
+    поэтому решение запоминается в AuthorStats.fan_in и не меняется,
+    когда подписчиков снова становится меньше.
+    """
+    followers, fan_in = AuthorStats.objects.filter(
+        user_id=author_id).values_list(
+            'followers_count', 'fan_in').first() or (0, False)
+    if fan_in:
+        return False
+    if followers <= settings.TIMELINE_FANOUT_LIMIT:
+        return True
+    AuthorStats.objects.filter(user_id=author_id).update(fan_in=True)
+    return False
+
+
+def create_entries(entries):
+    # Django 2.2 не уменьшает batch_size до предела базы: в SQLite
+    # в одном INSERT помещается не больше ~500 строк
+    fields = [TimelineEntry._meta.get_field(name) for name in ('user', 'post')]
+    batch_size = connection.ops.bulk_batch_size(
+        fields, [None] * settings.TIMELINE_BATCH_SIZE)
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=max(batch_size, 1), ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    if not is_fan_out_author(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    create_entries(
+        TimelineEntry(user_id=user_id, post=post)
+        for user_id in follower_ids.iterator())
+
+
+def backfill_timeline(user_id, author_id):
+    if not is_fan_out_author(author_id):
+        return
+    post_ids = Post.objects.filter(author_id=author_id).values_list(
+        'pk', flat=True)[:settings.TIMELINE_BACKFILL_LIMIT]
+    create_entries(
+        TimelineEntry(user_id=user_id, post_id=post_id)
+        for post_id in post_ids)
+
+
+def fan_out_posts(posts):
+    """Раскладывает пачку постов по лентам подписчиков их авторов."""
+    author_ids = {post.author_id for post in posts}
+    author_ids = {
+        author_id for author_id in author_ids
+        if is_fan_out_author(author_id)
+    }
+    followers = {}
+    for author_id, user_id in Follow.objects.filter(
+            author_id__in=author_ids).values_list(
+            'author_id', 'user_id').iterator():
+        followers.setdefault(author_id, []).append(user_id)
+    create_entries(
+        TimelineEntry(user_id=user_id, post_id=post.pk)
+        for post in posts for user_id in followers.get(post.author_id, ()))
+
+
+def backfill_timelines(follows):
+    """backfill_timeline для пачки подписок: посты каждого автора
+    выбираются одним запросом.
+    """
+    users = {}
+    for follow in follows:
+        users.setdefault(follow.author_id, []).append(follow.user_id)
+    for author_id, user_ids in users.items():
+        if not is_fan_out_author(author_id):
+            continue
+        post_ids = list(Post.objects.filter(author_id=author_id).values_list(
+            'pk', flat=True)[:settings.TIMELINE_BACKFILL_LIMIT])
+        create_entries(
+            TimelineEntry(user_id=user_id, post_id=post_id)
+            for user_id in user_ids for post_id in post_ids)
+
+
+def prune_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+def timeline_posts(user):
+    """Посты ленты подписок: материализованные записи плюс посты
+    популярных авторов, которые не раскладывались при записи.
+    """
+    posts = Post.objects.filter(timeline_entries__user=user)
+    fan_in_authors = list(Follow.objects.filter(
+        Q(author__stats__fan_in=True)
+        | Q(author__stats__followers_count__gt=(
+            settings.TIMELINE_FANOUT_LIMIT)),
+        user=user,
+    ).values_list('author_id', flat=True))
+    if fan_in_authors:
+        posts = Post.objects.filter(
+            Q(pk__in=TimelineEntry.objects.filter(
+                user=user).values('post_id'))
+            | Q(author_id__in=fan_in_authors)
+        )
+    return posts
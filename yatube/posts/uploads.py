@@ -0,0 +1,108 @@
+from functools import wraps
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+# Форматы, в которых уменьшенная картинка сохраняется иначе: после
+# thumbnail() от MPO остается один кадр, то есть обычный JPEG
+SAVE_FORMATS = {'MPO': 'JPEG'}
+# Форматы, которые draft() уменьшает прямо при декодировании
+DRAFT_FORMATS = ('JPEG', 'MPO')
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл по частям.
+
+    После POST_IMAGE_MAX_UPLOAD_SIZE байт данные больше не сохраняются,
+    но размер продолжает считаться, чтобы форма отклонила файл. Файл
+    получается обрезанным, поэтому обработчик ставится только
+    представлениям с limit_uploads, формы которых проверяют размер.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = self.received
+        return self.file
+
+
+def limit_uploads(view):
+    """Принимает файлы представления через LimitedTemporaryFileUploadHandler.
+
+    Обработчики можно сменить только до разбора request.POST, а
+    CsrfViewMiddleware разбирает его раньше представления, поэтому CSRF
+    проверяется внутри декоратора.
+    """
+    protected_view = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [LimitedTemporaryFileUploadHandler(request)]
+        return protected_view(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
+
+
+def downsize_image(uploaded):
+    """Уменьшает картинку до POST_IMAGE_MAX_RESOLUTION.
+
+    Для JPEG draft() декодирует сразу в уменьшенном масштабе, поэтому
+    полноразмерный растр в памяти не создается. Остальные форматы
+    декодируются целиком, их разрешение ограничивает
+    validate_image_upload.
+    """
+    max_size = settings.POST_IMAGE_MAX_RESOLUTION
+    uploaded.seek(0)
+    with Image.open(uploaded) as image:
+        if image.width <= max_size[0] and image.height <= max_size[1]:
+            uploaded.seek(0)
+            return uploaded
+        image_format = SAVE_FORMATS.get(image.format, image.format)
+        image.draft(image.mode, max_size)
+        image.thumbnail(max_size, Image.LANCZOS)
+        output = TemporaryUploadedFile(
+            uploaded.name, uploaded.content_type, 0, None)
+        image.save(output, format=image_format)
+    output.size = output.tell()
+    output.seek(0)
+    return output
+
+
+def validate_image_upload(image):
+    """Проверяет размер файла и разрешение картинки по заголовку.
+
+    Image.open читает только заголовок и не декодирует растр. Картинки,
+    которые downsize_image декодирует целиком, ограничены
+    POST_IMAGE_MAX_DECODED_PIXELS.
+    """
+    if image.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise forms.ValidationError(
+            'Файл больше %(limit)s.', code='too_large',
+            params={
+                'limit': filesizeformat(settings.POST_IMAGE_MAX_UPLOAD_SIZE)},
+        )
+    image.seek(0)
+    with Image.open(image) as header:
+        pixels = header.width * header.height
+        limit = settings.POST_IMAGE_MAX_PIXELS
+        if header.format not in DRAFT_FORMATS:
+            limit = min(limit, settings.POST_IMAGE_MAX_DECODED_PIXELS)
+    if pixels > limit:
+        raise forms.ValidationError(
+            'Разрешение картинки больше %(limit)s Мп.',
+            code='too_many_pixels',
+            params={'limit': limit // 10 ** 6},
+        )
+    image.seek(0)
@@ -1,68 +1,113 @@
+from urllib.parse import urlencode
+
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.conf import settings
+from django.db import transaction
 
 from .models import Post, Group, User, Follow
 from .forms import PostForm, CommentForm
-
-
-def get_page_context(queryset, page):
-    paginator = Paginator(queryset, settings.POSTS_IN_PAGE)
+from .cards import PostCards
+from .conditional import (
+    conditional_page, group_post_etag, index_etag, post_detail_etag,
+    profile_etag
+)
+from .counters import feed_count_key
+from .generations import get_generation
+from .paginators import (
+    CachedCountPaginator, CursorPaginator, RankCursorPaginator
+)
+from .search import search_posts
+from .thumbnails import schedule_post_thumbnails
+from .timeline import timeline_posts
+from .uploads import limit_uploads
+
+
+def get_page_context(queryset, page, count_key=None):
+    paginator = CachedCountPaginator(
+        queryset, settings.POSTS_IN_PAGE, count_key=count_key)
     page_obj = paginator.get_page(page)
     return page_obj
 
 
+def get_feed_page_context(queryset, request, count_key=None):
+    """Страница ленты постов: по курсору или по номеру страницы."""
+    cursor = request.GET.get('cursor')
+    if settings.POSTS_CURSOR_PAGINATION or cursor is not None:
+        paginator = CursorPaginator(
+            queryset, settings.POSTS_IN_PAGE, count_key=count_key)
+        return paginator.get_page(cursor)
+    return get_page_context(queryset, request.GET.get('page'), count_key)
+
+
+@conditional_page(index_etag)
 def index(request):
     template = 'posts/index.html'
     posts = Post.objects.select_related('author', 'group')
+    page_obj = get_feed_page_context(
+        posts, request, feed_count_key('all'))
     context = {
-        'page_obj': get_page_context(posts, request.GET.get('page')),
+        'page_obj': page_obj,
+        'post_cards': PostCards(page_obj),
+        'cache_generation': get_generation('index'),
     }
     return render(request, template, context)
 
 
+@conditional_page(group_post_etag)
 def group_post(request, slug):
     template = 'posts/group_list.html'
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('author')
+    page_obj = get_feed_page_context(
+        posts, request, feed_count_key('group', group.pk))
     context = {
         'group': group,
-        'page_obj': get_page_context(posts, request.GET.get('page')),
+        'page_obj': page_obj,
+        'post_cards': PostCards(page_obj),
+        'cache_generation': get_generation('group', group.pk),
     }
     return render(request, template, context)
 
 
+@conditional_page(profile_etag)
 def profile(request, username):
     template = 'posts/profile.html'
     author = get_object_or_404(User, username=username)
     posts = author.posts.select_related('group')
     following = request.user.is_authenticated and author.following.filter(
         user=request.user).exists()
+    page_obj = get_feed_page_context(
+        posts, request, feed_count_key('author', author.pk))
     context = {
         'author': author,
         'following': following,
-        'page_obj': get_page_context(posts, request.GET.get('page')),
+        'page_obj': page_obj,
+        'post_cards': PostCards(page_obj),
+        'cache_generation': get_generation('profile', author.pk),
     }
     return render(request, template, context)
 
 
+@conditional_page(post_detail_etag)
 def post_detail(request, post_id):
     template = 'posts/post_detail.html'
     post = (
         get_object_or_404
-        (Post.objects.select_related('author', 'group'), pk=post_id)
+        (Post.objects.select_related('author__stats', 'group'), pk=post_id)
     )
     comments = post.comments.select_related('author')
     context = {
         'post': post,
         'comments': comments,
+        'cache_generation': get_generation('post', post.pk),
         'form': CommentForm()
     }
     return render(request, template, context)
 
 
 @login_required
+@limit_uploads
 def post_create(request):
     template = 'posts/create_post.html'
     form = PostForm(request.POST or None,
@@ -70,12 +115,16 @@ def post_create(request):
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
-        form.save()
+        # Картинка проверяется хранилищем после фиксации поста
+        with transaction.atomic():
+            form.save()
+        schedule_post_thumbnails(post)
         return redirect('posts:profile', post.author.username)
     return render(request, template, {'form': form})
 
 
 @login_required
+@limit_uploads
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
     post = (
@@ -88,7 +137,9 @@ def post_edit(request, post_id):
                     files=request.FILES or None,
                     instance=post,)
     if form.is_valid():
-        form.save()
+        with transaction.atomic():
+            form.save()
+        schedule_post_thumbnails(post)
         return redirect('posts:post_detail', post_id=post.id)
     return render(request, template, {'form': form, 'is_edit': True, })
 
@@ -108,10 +159,28 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    posts = Post.objects.filter(
-        author__following__user=request.user).select_related('author', 'group')
+    posts = timeline_posts(request.user).select_related('author', 'group')
+    page_obj = get_feed_page_context(
+        posts, request, feed_count_key('follow', request.user.pk))
+    context = {
+        'page_obj': page_obj,
+        'post_cards': PostCards(page_obj),
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(
+        Post.objects.select_related('author', 'group'), query)
+    paginator = RankCursorPaginator(posts, settings.POSTS_IN_PAGE)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
-        'page_obj': get_page_context(posts, request.GET.get('page')),
+        'query': query,
+        'page_query': urlencode({'q': query}),
+        'page_obj': page_obj,
+        'post_cards': PostCards(page_obj),
     }
     return render(request, template, context)
 
@@ -136,7 +205,8 @@ def profile_unfollow(request, username):
 @login_required
 def my_follow(request):
     template = 'posts/follow_page.html'
-    authors = request.user.follower.select_related('author')
+    authors = request.user.follower.select_related(
+        'author__stats').order_by('-pk')
     context = {
         'page_obj': get_page_context(authors, request.GET.get('page')),
         'is_edit': True
@@ -147,7 +217,8 @@ def my_follow(request):
 @login_required
 def my_follower(request):
     template = 'posts/follow_page.html'
-    authors = request.user.following.select_related('author')
+    authors = request.user.following.select_related(
+        'user__stats').order_by('-pk')
     context = {
         'page_obj': get_page_context(authors, request.GET.get('page')),
     }
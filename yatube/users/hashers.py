@@ -0,0 +1,99 @@
+"""Хешеры паролей, которые считают хеш в отдельном ограниченном пуле.
+
+Хеш пароля занимает CPU на десятки и сотни миллисекунд. Пул из
+PASSWORD_HASHING_WORKERS потоков ограничивает, сколько хешей считается
+одновременно. Вместе с очередью пул меньше числа потоков воркера
+(GUNICORN_THREADS), поэтому волна входов и регистраций не занимает все
+потоки. Запрос, который за PASSWORD_HASHING_TIMEOUT секунд не попал в
+очередь пула, получает 503. hashlib и argon2 отпускают GIL, так что в
+gthread воркере остальные потоки тем временем отдают страницы.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_local = threading.local()
+
+
+class HashingBusy(Exception):
+    """Очередь пула хеширования паролей заполнена."""
+
+
+class HashingPool:
+    def __init__(self, workers, queue_size, timeout):
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.timeout = timeout
+
+    def call(self, func, args):
+        _local.in_pool = True
+        try:
+            return func(*args)
+        finally:
+            _local.in_pool = False
+
+    def run(self, func, *args):
+        # verify хешеров вызывает encode: внутри пула считаем на месте,
+        # иначе вложенная задача ждала бы свободный поток пула
+        if getattr(_local, 'in_pool', False):
+            return func(*args)
+        if not self.slots.acquire(timeout=self.timeout):
+            raise HashingBusy
+        try:
+            return self.executor.submit(self.call, func, args).result()
+        finally:
+            self.slots.release()
+
+
+@lru_cache()
+def get_pool():
+    return HashingPool(settings.PASSWORD_HASHING_WORKERS,
+                       settings.PASSWORD_HASHING_QUEUE,
+                       settings.PASSWORD_HASHING_TIMEOUT)
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    if setting.startswith('PASSWORD_HASHING_'):
+        if get_pool.cache_info().currsize:
+            get_pool().executor.shutdown(wait=False)
+        get_pool.cache_clear()
+
+
+class PooledHasherMixin:
+    def encode(self, password, salt, *args):
+        return get_pool().run(super().encode, password, salt, *args)
+
+    def verify(self, password, encoded):
+        return get_pool().run(super().verify, password, encoded)
+
+    def harden_runtime(self, password, encoded):
+        get_pool().run(super().harden_runtime, password, encoded)
+
+
+class PBKDF2PasswordHasher(PooledHasherMixin, hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class Argon2PasswordHasher(PooledHasherMixin, hashers.Argon2PasswordHasher):
+    """Argon2 с параметрами из настроек; нужен пакет argon2-cffi."""
+
+    @property
+    def time_cost(self):
+        return settings.ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.ARGON2_PARALLELISM
@@ -0,0 +1,41 @@
+import time
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+
+# Параметр стоимости хешера и настройка, которая его задает
+TUNABLE = {
+    'pbkdf2_sha256': ('iterations', 'PASSWORD_PBKDF2_ITERATIONS', 1000),
+    'argon2': ('time_cost', 'ARGON2_TIME_COST', 1),
+}
+
+
+class Command(BaseCommand):
+    help = ('Замеряет время хеширования пароля текущим хешером и '
+            'подбирает его стоимость под целевое время на этом сервере')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms', type=float, default=100,
+            help='Желаемое время одного хеша в миллисекундах',
+        )
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        hasher = get_hasher()
+        if hasher.algorithm not in TUNABLE:
+            raise CommandError(f'Хешер {hasher.algorithm} не настраивается')
+        attribute, setting, step = TUNABLE[hasher.algorithm]
+        salt = hasher.salt()
+        started = time.perf_counter()
+        for _ in range(options['rounds']):
+            hasher.encode('password', salt)
+        elapsed = (time.perf_counter() - started) * 1000 / options['rounds']
+        cost = getattr(hasher, attribute)
+        suggested = max(step, round(
+            cost * options['target_ms'] / elapsed / step) * step)
+        self.stdout.write(
+            f'{hasher.algorithm}: {attribute}={cost}, {elapsed:.1f} мс '
+            f'на хеш')
+        self.stdout.write(self.style.SUCCESS(
+            f'Для {options["target_ms"]:.0f} мс: {setting}={suggested}'))
@@ -0,0 +1,24 @@
+from http import HTTPStatus
+
+from django.http import HttpResponse
+
+from .hashers import HashingBusy
+
+
+class PasswordHashingBusyMiddleware:
+    """Отвечает 503, когда очередь хеширования паролей заполнена."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingBusy):
+            response = HttpResponse(
+                'Слишком много входов, попробуйте через несколько секунд',
+                status=HTTPStatus.SERVICE_UNAVAILABLE)
+            response['Retry-After'] = '5'
+            return response
+        return None
@@ -0,0 +1,106 @@
+import threading
+import time
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model, hashers
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from users.hashers import HashingBusy, get_pool
+
+User = get_user_model()
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='Stepan', password='secret-password')
+
+    def test_hash_computed_in_pool(self):
+        """Хеш пароля считается в потоке пула хеширования."""
+        threads = []
+        encode = hashers.PBKDF2PasswordHasher.encode
+
+        def record_thread(*args):
+            threads.append(threading.current_thread().name)
+            return encode(*args)
+
+        with mock.patch.object(
+                hashers.PBKDF2PasswordHasher, 'encode', record_thread):
+            make_password('password')
+        self.assertTrue(threads[0].startswith('password-hashing'))
+
+    def test_login_rehashes_outdated_password(self):
+        """При входе хеш со старыми параметрами пересчитывается."""
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertTrue(Client().login(
+                username='Stepan', password='secret-password'))
+        self.user.refresh_from_db()
+        self.assertIn('$2000$', self.user.password)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0,
+                       PASSWORD_HASHING_TIMEOUT=0)
+    def test_full_pool_rejects_login(self):
+        """Когда очередь хеширования заполнена, вход получает 503."""
+        pool = get_pool()
+        pool.slots.acquire()
+        self.addCleanup(pool.slots.release)
+        with self.assertRaises(HashingBusy):
+            make_password('password')
+        response = Client().post(reverse('users:login'), {
+            'username': 'Stepan', 'password': 'secret-password'})
+        self.assertEqual(response.status_code,
+                         HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+
+    def test_default_pool_leaves_worker_thread_free(self):
+        """С настройками по умолчанию хеши занимают не все потоки
+        воркера: лишний вход сразу получает HashingBusy."""
+        release = threading.Event()
+        busy = []
+        encode = hashers.PBKDF2PasswordHasher.encode
+
+        def slow_encode(*args):
+            release.wait(5)
+            return encode(*args)
+
+        def login():
+            try:
+                make_password('password')
+            except HashingBusy:
+                busy.append(threading.current_thread().name)
+
+        threads = [threading.Thread(target=login)
+                   for _ in range(settings.GUNICORN_THREADS)]
+        with mock.patch.object(
+                hashers.PBKDF2PasswordHasher, 'encode', slow_encode):
+            for thread in threads:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while not busy and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(busy), 1)
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1)
+    def test_reset_pool_shuts_down_executor(self):
+        """Смена настроек пула останавливает потоки старого пула."""
+        pool = get_pool()
+        with self.settings(PASSWORD_HASHING_WORKERS=2):
+            self.assertIsNot(get_pool(), pool)
+        with self.assertRaises(RuntimeError):
+            pool.executor.submit(print)
+
+    def test_tune_password_hasher(self):
+        """Команда предлагает число итераций под целевое время."""
+        output = StringIO()
+        call_command('tune_password_hasher', rounds=1, stdout=output)
+        self.assertIn('PASSWORD_PBKDF2_ITERATIONS=', output.getvalue())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -25,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -32,8 +34,12 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'users.middleware.PasswordHashingBusyMiddleware',
 ]
 
+# Заголовок Server-Timing с замерами запроса для всех, а не только персонала
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
@@ -47,6 +53,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cache.fragment_cache',
             ],
         },
     },
@@ -96,6 +103,36 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Хешер новых паролей: pbkdf2 или argon2 (нужен argon2-cffi). Хеши другого
+# алгоритма или с устаревшими параметрами пересчитываются при входе.
+# Параметры подбираются командой tune_password_hasher.
+PASSWORD_HASHERS = [
+    'users.hashers.PBKDF2PasswordHasher',
+    'users.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+if os.getenv('PASSWORD_HASHER') == 'argon2':
+    PASSWORD_HASHERS[:2] = reversed(PASSWORD_HASHERS[:2])
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.getenv('PASSWORD_PBKDF2_ITERATIONS', 150000))
+# По умолчанию рекомендация OWASP: 19 МиБ памяти, 2 прохода, 1 поток
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 19456))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 1))
+
+# Потоков gthread-воркера gunicorn, Dockerfile берет то же значение
+GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', 4))
+# Пул хеширования паролей: потоков, мест в очереди и секунд ожидания места,
+# после которых вход или регистрация получают 503. Мест в пуле и очереди
+# меньше, чем потоков воркера, а место не ждется, поэтому хотя бы один
+# поток воркера всегда отдает страницы.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', 2))
+PASSWORD_HASHING_QUEUE = int(os.getenv(
+    'PASSWORD_HASHING_QUEUE',
+    max(GUNICORN_THREADS - PASSWORD_HASHING_WORKERS - 1, 0)))
+PASSWORD_HASHING_TIMEOUT = float(os.getenv('PASSWORD_HASHING_TIMEOUT', 0))
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -113,6 +150,48 @@ STATIC_URL = '/static/'
 
 POSTS_IN_PAGE = 10  # число постов на странице (еще используется в тестах)
 
+# Keyset-пагинация лент по ?cursor= вместо ?page= (OFFSET + COUNT)
+POSTS_CURSOR_PAGINATION = os.getenv('POSTS_CURSOR_PAGINATION') == 'True'
+
+# Время жизни закэшированного числа постов ленты (сбрасывается сигналами)
+POSTS_COUNT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кэш целых страниц лент и поста для анонимных читателей, сек. Ключ
+# содержит поколения данных, поэтому срок нужен только для уборки.
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+# Сколько nginx отдает анонимную страницу без перепроверки, сек
+PAGE_CACHE_MAX_AGE = int(os.getenv('PAGE_CACHE_MAX_AGE', 30))
+# Фрагменты шаблонов, сек. Ключи тоже меняются с поколениями, срок
+# убирает из кэша фрагменты устаревших поколений.
+FRAGMENT_CACHE_TIMEOUT = int(
+    os.getenv('FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# Лента подписок: посты авторов, у которых подписчиков не больше лимита,
+# раскладываются по лентам при публикации, остальные читаются при запросе
+TIMELINE_FANOUT_LIMIT = 10000
+TIMELINE_BACKFILL_LIMIT = 1000  # постов автора добавляется при подписке
+TIMELINE_BATCH_SIZE = 1000
+
+# Миниатюры картинок постов создаются в фоновом пуле потоков, а не в запросе.
+# THUMBNAIL_WORKERS=0 — создавать сразу, в том же потоке.
+THUMBNAIL_BACKEND = 'posts.thumbnails.PregeneratedThumbnailBackend'
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', '2'))
+THUMBNAIL_QUEUE_LIMIT = 100  # миниатюр в очереди на воркер-процесс
+# Варианты картинок постов для srcset: ширины (по возрастанию, рамка 2:1)
+# и дополнительные форматы; AVIF используется, если его поддерживает Pillow
+POST_IMAGE_WIDTHS = (480, 800, 1200)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP')
+
+# Картинки постов пишутся во временный файл по частям (posts.uploads.
+# limit_uploads), проверяются по заголовку и уменьшаются до
+# POST_IMAGE_MAX_RESOLUTION перед сохранением. Не-JPEG картинки
+# декодируются целиком, поэтому их разрешение ограничено сильнее.
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50 * 10 ** 6
+POST_IMAGE_MAX_DECODED_PIXELS = 16 * 10 ** 6
+POST_IMAGE_MAX_RESOLUTION = (2560, 2560)
+
 
 # Редиректы которые будут использованы в проекте
 LOGIN_URL = 'users:login'
@@ -125,11 +204,57 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Хранилище сессий: hybrid (core.sessions: кэш и база, продление срока
+# записывается не чаще SESSION_WRITE_INTERVAL), db, cached_db (чтение из
+# кэша, без запроса к django_session) или signed_cookies (данные в
+# подписанной cookie)
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'hybrid')
+if SESSION_BACKEND == 'hybrid':
+    SESSION_ENGINE = 'core.sessions'
+else:
+    SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+# Скользящий срок сессии: с hybrid продление почти всегда не пишется
+SESSION_SAVE_EVERY_REQUEST = SESSION_BACKEND == 'hybrid'
+SESSION_WRITE_INTERVAL = 60 * 60
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Общий для всех воркеров кэш: redis, memcached или файловый (по умолчанию,
+# используется в тестах). CACHE_VERSION меняется, чтобы сбросить все ключи.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL', 'redis://redis:6379/0'),
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
     }
-}
+elif CACHE_BACKEND == 'memcached':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION', 'memcached:11211'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv(
+                'CACHE_LOCATION',
+                os.path.join(tempfile.gettempdir(), 'yatube_cache')),
+        }
+    }
+
+CACHES['default'].update({
+    'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'yatube'),
+    'VERSION': int(os.getenv('CACHE_VERSION', '1')),
+})
+
+# Тесты идут на своих пустых кэшах: файловый кэш переживает перезапуск
+TEST_RUNNER = 'core.test_runner.ClearCacheDiscoverRunner'
@@ -20,8 +20,11 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import performance_stats
+
 
 urlpatterns = [
+    path('admin/performance/', performance_stats, name='performance'),
     path('admin/', admin.site.urls),
     path('', include('posts.urls', namespace='posts')),
     path('auth/', include('users.urls', namespace='users')),